@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# end-to-end throughput of the posting commands against the local koillection stand-in
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from name.mock_server import MockKoillection
+
+ROOT = Path(__file__).resolve().parent.parent
+TARGET_ID = "00000000-0000-4000-8000-000000000000"
+# cli arguments, csv from the repo, target kind, image column
+SCENARIOS = {
+    "post_pokemon": (["post-wishes", "--format", "pokemon", "--wishlist"], "csv/baseset.csv", "wishlists", "Image URL"),
+    "post_murakami_wish": (["post-wishes", "--format", "murakami", "--wishlist"], "SP.csv", "wishlists", "image_url"),
+    "post_murakami_item": (["post-items", "--collection"], "mononoke_MMKTC.csv", "collections", "image_url"),
+}
+
+
+def prepare_csv(source, target, image_column, image_base, limit):
+    with open(source, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)[:limit]
+    # point every image at the stand-in, one url per row so nothing is served from the image cache
+    for n, row in enumerate(rows):
+        row[image_column] = f"{image_base}/images/{n}.png"
+    with open(target, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(name, rows, elapsed, log):
+    created = [entry for entry in log if entry["method"] == "POST" and entry["status"] == 201
+               and entry["path"] in ("/api/wishes", "/api/items")]
+    # per-item latency runs from the create request to the last request touching that wish/item
+    spans = {}
+    for entry in log:
+        if entry["id"] is None or entry["status"] >= 400:
+            continue
+        start, end = spans.get(entry["id"], (entry["start"], entry["end"]))
+        spans[entry["id"]] = (min(start, entry["start"]), max(end, entry["end"]))
+    latencies = [spans[entry["id"]][1] - spans[entry["id"]][0] for entry in created]
+    return {
+        "scenario": name,
+        "rows": rows,
+        "created": len(created),
+        "requests": len(log),
+        "throttled": sum(entry["status"] == 429 for entry in log),
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(len(created) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+def run_scenario(name, limit, server_options, script_args):
+    command, source, target_kind, image_column = SCENARIOS[name]
+    with MockKoillection(**server_options) as mock, tempfile.TemporaryDirectory() as workdir:
+        Path(workdir, "credentials.txt").write_text("username: bench\npassword: bench\n")
+        csv_path = os.path.join(workdir, Path(source).name)
+        rows = prepare_csv(ROOT / source, csv_path, image_column, mock.url, limit)
+        target = f"{mock.url}/{target_kind}/{TARGET_ID}"
+
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, "-m", "name", *command, target, csv_path, "--domain", mock.url, *script_args],
+            text=True, capture_output=True, cwd=workdir,
+        )
+        elapsed = time.monotonic() - started
+        if result.returncode:
+            sys.stderr.write(result.stdout + result.stderr)
+            raise SystemExit(f"{command[0]} exited with {result.returncode}")
+        return summarize(name, rows, elapsed, mock.log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the posting commands against a local koillection stand-in")
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--limit", type=int, default=100, help="rows taken from each csv")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=int, help="requests per second before the server answers 429")
+    parser.add_argument("--json", action="store_true", help="print results as json lines")
+    args, script_args = parser.parse_known_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    server_options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "rate_limit": args.rate_limit,
+        "seed": 0,
+    }
+    for name in args.scenarios or SCENARIOS:
+        summary = run_scenario(name, args.limit, server_options, script_args)
+        if args.json:
+            print(json.dumps(summary))
+        else:
+            print(f"{name:20} {summary['created']:4}/{summary['rows']:<4} items {summary['items_per_second']:7.2f} items/s"
+                  f"  p50 {summary['p50_ms']:7.1f} ms  p95 {summary['p95_ms']:7.1f} ms  429s {summary['throttled']}")
+
+
+if __name__ == "__main__":
+    main()
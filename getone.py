@@ -1,51 +1,112 @@
+import argparse
 import requests
-from lxml import html
+from lxml import etree, html
 import csv
+from concurrent.futures import ThreadPoolExecutor
 
+from name.cache import add_cache_arguments, cache_from_args
+from name.fetch import thread_session
+from name.metrics import METRICS, add_metrics_arguments, write_metrics
+from name.replay import add_tape_arguments, tape_from_args
+from name.retry import add_retry_arguments, retry_from_args
+from name.stream import extract_streaming
 
-def fetch_and_extract(url):
+DEFAULT_URLS = ["https://www.discogs.com/release/27856575-Akari-Kaida-Mega-Man-Battle-Network-Original-Video-Game-Soundtrack"]
+DEFAULT_WORKERS = 4
+# field -> xpath, the cover is the first image on a release page
+XPATHS = {
+    "Image URL": "(//img)[1]/@src",
+}
+
+
+def fetch_and_extract(url, cache=None):
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        if cache:
+            content = cache.get(url)
+        else:
+            response = thread_session().get(url)
+            response.raise_for_status()
+            content = response.content
     except requests.RequestException as e:
         print(f"[ERROR] Fetching {url}: {e}")
         return None
 
-    tree = html.fromstring(response.content)
-
-    def safe_xpath(xpath_expr, default=""):
+    with METRICS.phase("parse"):
         try:
-            return tree.xpath(xpath_expr)[0].strip()
-        except (IndexError, AttributeError):
-            return default
+            tree = html.fromstring(content)
+        except etree.LxmlError as e:
+            # an empty or garbled page only loses its own row
+            print(f"[ERROR] Parsing {url}: {e}")
+            return None
+
+        def safe_xpath(xpath_expr, default=""):
+            try:
+                return tree.xpath(xpath_expr)[0].strip()
+            except (IndexError, AttributeError):
+                return default
+
+        return {"URL": url, **{field: safe_xpath(xpath) for field, xpath in XPATHS.items()}}
+
+
+def stream_and_extract(url):
+    # the cover sits near the top of a release page, so stop downloading once the xpaths are answered
+    try:
+        values, received = extract_streaming(url, XPATHS)
+    except requests.RequestException as e:
+        print(f"[ERROR] Fetching {url}: {e}")
+        return None
+    except etree.LxmlError as e:
+        print(f"[ERROR] Parsing {url}: {e}")
+        return None
+    print(f"[INFO] Read {received} bytes of {url}")
+    return {"URL": url, **values}
+
+
+def read_urls(path):
+    # one url per line, blank lines and # comments are skipped
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
 
-    return {
-        "URL": url,
-        "Image URL": safe_xpath("(//img)[1]/@src"),
-    }
 
 def main():
-    urls = [ "https://www.discogs.com/release/27856575-Akari-Kaida-Mega-Man-Battle-Network-Original-Video-Game-Soundtrack" ]
+    parser = argparse.ArgumentParser(description="Grab the cover image url of discogs releases")
+    parser.add_argument("--urls", metavar="FILE", help="file with one release url per line (default: a single built-in release)")
+    parser.add_argument("--output", default="one.csv", help="csv file to write (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="pages fetched at once (default: %(default)s)")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse pages while they download and hang up once every field is found, bypasses the page cache")
+    add_cache_arguments(parser)
+    add_retry_arguments(parser)
+    add_tape_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    retry_from_args(args)
+    tape_from_args(args)
+    cache = cache_from_args(args)
 
-    all_data = []
+    urls = read_urls(args.urls) if args.urls else DEFAULT_URLS
 
-    for url in urls:
+    def process(url):
         print(f"[INFO] Processing: {url}")
-        data = fetch_and_extract(url)
-        if data:
-            all_data.append(data)
+        return stream_and_extract(url) if args.stream else fetch_and_extract(url, cache)
+
+    # map keeps the rows in the order of the url list
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        all_data = [data for data in pool.map(process, urls) if data]
 
     if not all_data:
         print("[WARN] No data fetched.")
+        write_metrics(args)
         return
 
-    csv_file = f"one.csv"
-    with open(csv_file, mode="w", newline="", encoding="utf-8") as file:
+    csv_file = args.output
+    with METRICS.phase("csv"), open(csv_file, mode="w", newline="", encoding="utf-8") as file:
         writer = csv.DictWriter(file, fieldnames=all_data[0].keys())
         writer.writeheader()
         writer.writerows(all_data)
 
     print(f"[SUCCESS] Wrote {len(all_data)} entries to {csv_file}")
+    write_metrics(args)
 
 if __name__ == "__main__":
     main()
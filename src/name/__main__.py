@@ -0,0 +1,5 @@
+import sys
+
+from name.cli import main
+
+sys.exit(main())
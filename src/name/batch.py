@@ -0,0 +1,102 @@
+import tomllib
+
+from name.journal import Journal, journal_path
+from name.pipeline import Job
+from name.posting import FORMATS, Target, item_data, load_cards_from_csv, post_jobs, save_posted_cards, sync_target, target_iri
+from name.validate import print_problems, validate_cards
+
+JOB_KEYS = {"csv", "wishlist", "collection", "format", "sync", "update", "delete", "posted-csv", "item-data"}
+
+
+def load_manifest(path):
+    # [[job]] tables, each sending one csv to one wishlist or collection
+    with open(path, "rb") as f:
+        entries = tomllib.load(f).get("job", [])
+    if not entries:
+        raise ValueError(f"{path} has no [[job]] entries")
+    seen = set()
+    for number, entry in enumerate(entries, 1):
+        unknown = set(entry) - JOB_KEYS
+        if unknown:
+            raise ValueError(f"job {number} in {path}: unknown key(s) {', '.join(sorted(unknown))}")
+        if "csv" not in entry or ("wishlist" in entry) == ("collection" in entry):
+            raise ValueError(f"job {number} in {path} needs a csv and exactly one of wishlist or collection")
+        if entry.get("format", "pokemon") not in FORMATS:
+            raise ValueError(f"job {number} in {path}: format must be one of {', '.join(FORMATS)}")
+        if not isinstance(entry.get("item-data", {}), dict):
+            raise ValueError(f"job {number} in {path}: item-data must be a table of label = column")
+        try:
+            item_data(entry.get("item-data"))
+        except ValueError as e:
+            raise ValueError(f"job {number} in {path}: {e}") from None
+        # the journal lives next to the csv, two jobs on one csv would overwrite each other's progress
+        if entry["csv"] in seen:
+            raise ValueError(f"job {number} in {path}: {entry['csv']} is already used by an earlier job")
+        seen.add(entry["csv"])
+    return entries
+
+
+def interleave(groups):
+    # round robin over the targets so a big csv doesn't hold back the small ones queued after it
+    iterators = [iter(group) for group in groups]
+    while iterators:
+        for iterator in list(iterators):
+            try:
+                yield next(iterator)
+            except StopIteration:
+                iterators.remove(iterator)
+
+
+def print_batch_report(job):
+    for message in job.messages:
+        print(f"[{job.target.name}] {message}")
+
+
+def _target(entry, resume, catalog, default_item_data=None):
+    if "wishlist" in entry:
+        iri = target_iri(entry["wishlist"], "wishlists")
+    else:
+        iri = target_iri(entry["collection"], "collections")
+    journal = Journal(journal_path(entry["csv"]), resume=resume, target=iri)
+    if journal.foreign:
+        print(f"[WARN] {entry['csv']}: {journal.foreign} journal step(s) were recorded for another wishlist/collection, they are posted again here")
+    if "wishlist" in entry:
+        return Target("wishes", iri, FORMATS[entry.get("format", "pokemon")], journal, entry["csv"], catalog)
+    # a job's own item-data table goes on top of the --item-data of the whole batch
+    data = item_data({**(default_item_data or {}), **entry.get("item-data", {})})
+    return Target("items", iri, FORMATS["murakami"], journal, entry["csv"], catalog, data)
+
+
+def run_batch(client, entries, images, transformer=None, resume=False, catalog=None, strict=False, default_item_data=None):
+    # every job goes through the one client, so they share its connections, token and rate limits
+    targets = []
+    groups = []
+    try:
+        # every csv is checked before the first request, a bad row in the last one shouldn't surface mid-run
+        checked = []
+        for entry in entries:
+            target = _target(entry, resume, catalog, default_item_data)
+            targets.append(target)
+            cards = load_cards_from_csv(entry["csv"])
+            print(f"[INFO] {target.name}: found {len(cards)} card(s) to process.")
+            cards, problems = validate_cards(cards, target.card_format, target.resource, target.item_data)
+            print_problems(problems, target.name)
+            checked.append((entry, target, cards, problems))
+        if strict and any(problems for *_, problems in checked):
+            raise ValueError("some rows failed validation, nothing was sent")
+        for entry, target, cards, _ in checked:
+            if entry.get("sync"):
+                cards = sync_target(client, target, cards, update=entry.get("update", False), delete=entry.get("delete", False))
+            groups.append([Job(0, card, target=target) for card in cards])
+        jobs = post_jobs(client, interleave(groups), images, transformer, report=print_batch_report)
+    finally:
+        for target in targets:
+            target.journal.close()
+
+    for entry, target in zip(entries, targets):
+        own = [job for job in jobs if job.target is target]
+        failed = sum(job.failed for job in own)
+        print(f"[BATCH] {target.name}: {len(own) - failed} posted, {failed} failed")
+        if entry.get("posted-csv") and target.resource == "wishes":
+            save_posted_cards(own, target.card_format, entry["posted-csv"])
+    return jobs
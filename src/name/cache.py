@@ -0,0 +1,170 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+from name.fetch import thread_session
+from name.options import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, add_cache_arguments  # noqa: F401
+
+DEFAULT_MAX_BYTES = DEFAULT_CACHE_MAX_BYTES
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+# cache hits only bump their entry in memory, the index is written once this many have piled up (or on the next store)
+TOUCH_BATCH = 64
+
+
+def write_atomic(path, data):
+    # a temp name of its own per writer, several processes may save into the same directory at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def index_stamp(path):
+    # the index is only ever swapped in whole, so a changed stamp is the cue to read it again
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def directory_lock(directory):
+    fd = os.open(Path(directory) / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # unlocked explicitly, closing alone leaves the lock held while a forked child still has the descriptor
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class CacheMiss(requests.RequestException):
+    pass
+
+
+class ResponseCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index = {}
+        self._stamp = None
+        self._touched = {}
+        self._refresh()
+
+    def _load_index(self):
+        try:
+            with open(self.directory / INDEX_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _refresh(self):
+        # under self._lock; picks up what other processes stored without taking the directory lock
+        stamp = index_stamp(self.directory / INDEX_FILE)
+        if stamp != self._stamp:
+            self._index, self._stamp = self._load_index(), stamp
+
+    @contextmanager
+    def _updating_index(self):
+        # other processes may share the directory: reload the index under the lock, change it, write it back
+        with self._lock, directory_lock(self.directory):
+            self._index = self._load_index()
+            for key, used in self._touched.items():
+                if key in self._index:
+                    self._index[key]["used"] = max(self._index[key]["used"], used)
+            self._touched = {}
+            yield self._index
+            write_atomic(self.directory / INDEX_FILE, json.dumps(self._index).encode("utf-8"))
+            self._stamp = index_stamp(self.directory / INDEX_FILE)
+
+    def _path(self, key):
+        return self.directory / key
+
+    def _read(self, key):
+        with self._lock:
+            self._refresh()
+            if key not in self._index:
+                return None
+        try:
+            body = self._path(key).read_bytes()
+        except FileNotFoundError:
+            # the next store of this url replaces the entry
+            return None
+        with self._lock:
+            self._touched[key] = time.time()
+            flush = len(self._touched) >= TOUCH_BATCH
+        if flush:
+            with self._updating_index():
+                pass
+        return body
+
+    def _store(self, key, url, response):
+        with self._updating_index() as index:
+            write_atomic(self._path(key), response.content)
+            index[key] = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": len(response.content),
+                "used": time.time(),
+            }
+            self._evict()
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index.pop(key)["size"]
+            self._path(key).unlink(missing_ok=True)
+
+    def get(self, url, session=None):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        if self.offline:
+            body = self._read(key)
+            if body is None:
+                raise CacheMiss(f"{url} is not cached")
+            return body
+
+        session = session or thread_session()
+        headers = {}
+        with self._lock:
+            self._refresh()
+            entry = self._index.get(key)
+            if entry and self._path(key).exists():
+                if entry["etag"]:
+                    headers["If-None-Match"] = entry["etag"]
+                if entry["last_modified"]:
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and headers:
+            body = self._read(key)
+            if body is not None:
+                return body
+            response = session.get(url)
+        response.raise_for_status()
+        self._store(key, url, response)
+        return response.content
+
+
+def cache_from_args(args):
+    return ResponseCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024, offline=args.offline)
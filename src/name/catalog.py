@@ -0,0 +1,158 @@
+import csv
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from name.metrics import METRICS
+
+DEFAULT_CATALOG = "catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    set_code TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    name TEXT NOT NULL,
+    rarity TEXT,
+    image_url TEXT,
+    price TEXT,
+    url TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (set_code, card_id)
+);
+CREATE INDEX IF NOT EXISTS cards_name ON cards (name);
+CREATE TABLE IF NOT EXISTS postings (
+    set_code TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    target TEXT NOT NULL,
+    remote_id TEXT NOT NULL,
+    posted_at REAL NOT NULL,
+    PRIMARY KEY (set_code, card_id, target),
+    FOREIGN KEY (set_code, card_id) REFERENCES cards (set_code, card_id)
+);
+CREATE INDEX IF NOT EXISTS postings_remote_id ON postings (remote_id);
+CREATE INDEX IF NOT EXISTS postings_resource ON postings (set_code, card_id, resource);
+"""
+
+UPSERT = """
+INSERT INTO cards (set_code, card_id, format, name, rarity, image_url, price, url, data, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (set_code, card_id) DO UPDATE SET
+    format = excluded.format, name = excluded.name, rarity = coalesce(excluded.rarity, rarity),
+    image_url = coalesce(excluded.image_url, image_url), price = coalesce(excluded.price, price), url = coalesce(excluded.url, url),
+    data = json_patch(data, excluded.data), updated_at = excluded.updated_at
+"""
+# a csv with fewer columns than the stored card only updates the columns it has
+RECORD_POSTING = "INSERT OR REPLACE INTO postings (set_code, card_id, resource, target, remote_id, posted_at) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def detect_format(fieldnames):
+    # the limitless scraper writes capitalised columns, the kaikaikiki one lower case
+    fields = set(fieldnames or ())
+    if {"URL", "Name"} <= fields:
+        return "pokemon"
+    if {"id", "name"} <= fields:
+        return "murakami"
+    raise ValueError(f"unknown csv layout: {', '.join(fieldnames or ())}")
+
+
+def is_posted_csv(fieldnames):
+    # written by --posted-csv: a few card columns plus the id koillection gave each wish
+    return {"ID", "Image File"} <= set(fieldnames or ())
+
+
+def card_key(card, format_name):
+    # (set, id) of a scraped row: BS/1 from a limitless url, SP-001 is set SP
+    if format_name == "pokemon":
+        parts = urlparse(card["URL"]).path.rstrip("/").split("/")
+        return parts[-2], parts[-1]
+    return card["id"].rsplit("-", 1)[0], card["id"]
+
+
+def _row(card, format_name, now):
+    set_code, card_id = card_key(card, format_name)
+    if format_name == "pokemon":
+        rarity = card["Number"].partition("·")[2].strip() if "Number" in card else None
+        columns = (card["Name"], rarity, card.get("Image URL"), card.get("Price"), card["URL"])
+    else:
+        columns = (card["name"], card.get("rarity"), card.get("image_url"), None, None)
+    return (set_code, card_id, format_name, *columns, json.dumps(card, ensure_ascii=False), now)
+
+
+class Catalog:
+    def __init__(self, path=DEFAULT_CATALOG):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        # posting stages record remote ids from worker threads, the lock serialises them on this connection
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def upsert(self, cards, format_name):
+        now = time.time()
+        with METRICS.phase("catalog"), self._lock, self._db:
+            cursor = self._db.executemany(UPSERT, (_row(card, format_name, now) for card in cards))
+        return cursor.rowcount
+
+    def import_csv(self, path, wishlist=None):
+        # scraped cards are upserted; a posted-cards csv only says which wishes exist, so it is recorded as postings
+        # to the wishlist it was posted to and never touches the card data
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            format_name = detect_format(reader.fieldnames)
+            if not is_posted_csv(reader.fieldnames):
+                return self.upsert(reader, format_name)
+            if not wishlist:
+                raise ValueError(f"{path} lists posted wishes, not scraped cards; give the wishlist they were posted to to import them")
+            return self.record_postings(((card, card["ID"]) for card in reader), format_name, "wishes", wishlist)
+
+    def record_posting(self, card, format_name, resource, target, remote_id):
+        self.record_postings([(card, remote_id)], format_name, resource, target)
+
+    def record_postings(self, postings, format_name, resource, target):
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.executemany(RECORD_POSTING, ((*card_key(card, format_name), resource, target, remote_id, now)
+                                                           for card, remote_id in postings))
+        return cursor.rowcount
+
+    def cards(self, set_codes=None, missing_from_target=None, missing_from_resource=None):
+        # rows come straight off a cursor on a separate connection, so a large set is never held in memory
+        # and the posting threads can keep writing through self._db meanwhile
+        query = "SELECT data FROM cards c WHERE 1"
+        params = []
+        if set_codes:
+            query += f" AND set_code IN ({', '.join('?' * len(set_codes))})"
+            params += set_codes
+        if missing_from_target:
+            query += " AND NOT EXISTS (SELECT 1 FROM postings p WHERE p.set_code = c.set_code AND p.card_id = c.card_id AND p.target = ?)"
+            params.append(missing_from_target)
+        if missing_from_resource:
+            query += " AND NOT EXISTS (SELECT 1 FROM postings p WHERE p.set_code = c.set_code AND p.card_id = c.card_id AND p.resource = ?)"
+            params.append(missing_from_resource)
+        # rowid keeps the scrape order, so limitless card 10 comes after card 9
+        query += " ORDER BY c.rowid"
+        reader = sqlite3.connect(self.path)
+        try:
+            for (data,) in reader.execute(query, params):
+                yield json.loads(data)
+        finally:
+            reader.close()
+
+
+def add_catalog_arguments(parser):
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="sqlite card catalog the scraped cards are upserted into")
+    parser.add_argument("--no-catalog", dest="catalog", action="store_const", const=None, help="only write the csv files")
@@ -0,0 +1,465 @@
+import argparse
+import os
+
+# only argparse is imported up front, every command pulls in requests/lxml/pillow when it runs,
+# so `--help` and a bad flag return before any of them are loaded
+PROG = "koillection-tools"
+CONFIG_ENV = "KOILLECTION_TOOLS_CONFIG"
+
+
+def load_config(path, command):
+    # top-level keys apply to every command, a [command] table only to that command
+    import tomllib
+
+    with open(path, "rb") as f:
+        config = tomllib.load(f)
+    # any table that isn't named after a command, like [limits.image], is a shared key too
+    shared = {key: value for key, value in config.items() if key not in COMMANDS}
+    return _option_names(shared), _option_names(config.get(command, {}))
+
+
+def _option_names(values):
+    return {key.replace("-", "_"): value for key, value in values.items()}
+
+
+def _cache_arguments(parser):
+    from name.options import add_cache_arguments
+
+    add_cache_arguments(parser)
+
+
+def _metrics_arguments(parser):
+    from name.metrics import add_metrics_arguments
+
+    add_metrics_arguments(parser)
+
+
+def _network_arguments(parser):
+    from name.options import add_retry_arguments, add_tape_arguments
+
+    add_retry_arguments(parser)
+    add_tape_arguments(parser)
+
+
+def _item_data_arguments(parser):
+    from name.options import add_item_data_arguments
+
+    add_item_data_arguments(parser)
+
+
+def _catalog_arguments(parser):
+    from name.catalog import add_catalog_arguments
+
+    add_catalog_arguments(parser)
+
+
+def _scrape_limitless_arguments(parser):
+    from name.options import CSV_FIELDS, DEFAULT_PER_HOST, DEFAULT_WORKERS
+
+    parser.add_argument("set", help="set handle from the limitlesstcg url, e.g. BS for https://limitlesstcg.com/cards/BS")
+    parser.add_argument("--count", type=int, help="probe card pages 1..COUNT instead of reading the card list from the set page")
+    parser.add_argument("--fields", type=lambda value: [field.strip() for field in value.split(",")], default=CSV_FIELDS,
+                        help=f"comma separated csv columns (default: {','.join(CSV_FIELDS)}); "
+                             "URL, Name and Image URL come from the set page, Set from one card page, the rest needs every card page")
+    parser.add_argument("--output", help="csv to write (default: <set>.csv)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of concurrent fetches")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="maximum concurrent requests per host")
+    _cache_arguments(parser)
+    _network_arguments(parser)
+    _catalog_arguments(parser)
+    _metrics_arguments(parser)
+
+
+def _scrape_limitless(args):
+    from name.cache import cache_from_args
+    from name.limitless import CSV_FIELDS, card_urls, scrape, scrape_set, write_cards_csv
+    from name.metrics import write_metrics
+    from name.replay import tape_from_args
+    from name.retry import retry_from_args
+
+    retry_from_args(args)
+    tape_from_args(args)
+    unknown = [field for field in args.fields if field not in CSV_FIELDS]
+    if unknown or not {"URL", "Name"} <= set(args.fields):
+        raise SystemExit(f"{PROG} scrape-limitless: --fields must include URL and Name and only use {', '.join(CSV_FIELDS)}")
+    cache = cache_from_args(args)
+    if args.count:
+        cards = scrape(card_urls(args.set, args.count), workers=args.workers, per_host=args.per_host, cache=cache)
+        cards = [{field: card[field] for field in args.fields} for card in cards]
+    else:
+        cards = scrape_set(args.set, args.fields, workers=args.workers, per_host=args.per_host, cache=cache)
+    if cards:
+        csv_file = args.output or f"{args.set}.csv"
+        write_cards_csv(cards, csv_file)
+        print(f"[SUCCESS] Wrote {len(cards)} entries to {csv_file}")
+        if args.catalog:
+            from name.catalog import Catalog
+
+            with Catalog(args.catalog) as catalog:
+                catalog.upsert(cards, "pokemon")
+            print(f"[SUCCESS] Upserted {len(cards)} cards into {args.catalog}")
+    else:
+        print("[WARN] No data fetched.")
+    write_metrics(args)
+
+
+def _scrape_murakami_arguments(parser):
+    parser.add_argument("site", choices=["classic", "mononoke"], help="classic is mfctc.kaikaikiki.com, mononoke is mmktc.kaikaikiki.com")
+    _cache_arguments(parser)
+    _network_arguments(parser)
+    _catalog_arguments(parser)
+    _metrics_arguments(parser)
+
+
+def _scrape_murakami(args):
+    import lxml.html
+
+    from name.cache import cache_from_args
+    from name.kaikaikiki import SITES, delta_path, parse_cardlist, write_delta, write_set_csvs
+    from name.metrics import write_metrics
+    from name.replay import tape_from_args
+    from name.retry import retry_from_args
+
+    retry_from_args(args)
+    tape_from_args(args)
+    site = SITES[args.site]
+    doc = lxml.html.fromstring(cache_from_args(args).get(site["url"]).decode("utf-8"))
+    cards_by_set = parse_cardlist(doc, site["sets"], site["img_base"])
+    deltas = write_set_csvs(cards_by_set, site["prefix"])
+    pending = write_delta(deltas, delta_path(site["prefix"]))
+    print(f"[INFO] {sum(len(delta['added']) for delta in pending.values())} added card(s) not yet posted with --delta in {delta_path(site['prefix'])}")
+    if args.catalog:
+        from name.catalog import Catalog
+
+        # unchanged cards are already in the catalog from an earlier run
+        changed = [card for delta in deltas.values() for card in delta["added"] + delta["changed"]]
+        with Catalog(args.catalog) as catalog:
+            catalog.upsert(changed, "murakami")
+        print(f"[SUCCESS] Upserted {len(changed)} new or changed cards into {args.catalog}")
+    write_metrics(args)
+
+
+def _koillection_arguments(parser):
+    from name.ratelimit import add_rate_arguments
+    from name.tokens import add_token_cache_arguments
+    from name.transform import add_transform_arguments
+
+    parser.add_argument("--domain", default=os.environ.get("KOILLECTION_URL"), help="koillection base url (default: $KOILLECTION_URL or https://swag.swarsel.win)")
+    parser.add_argument("--credentials", default="credentials.txt", help="file with the username: and password: lines")
+    from name.options import DEFAULT_IMAGE_MAX_BYTES
+
+    parser.add_argument("--image-dir", default="image", help="where downloaded card images are cached")
+    parser.add_argument("--image-cache-max-mb", type=int, default=DEFAULT_IMAGE_MAX_BYTES // (1024 * 1024),
+                        help="image cache size cap, least recently used images are evicted first (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="skip cards and stages already recorded in the journal of an earlier run")
+    parser.add_argument("--strict", action="store_true", help="stop before sending anything if a row fails validation instead of skipping it")
+    add_token_cache_arguments(parser)
+    add_rate_arguments(parser)
+    add_transform_arguments(parser)
+    _network_arguments(parser)
+    _metrics_arguments(parser)
+
+
+def _post_arguments(parser):
+    from name.catalog import DEFAULT_CATALOG
+
+    parser.add_argument("csv", nargs="?", help="card csv written by one of the scrape commands")
+    parser.add_argument("--set", action="append", help="read the cards of this set from the catalog instead of a csv, can be repeated")
+    parser.add_argument("--delta", help="only post the murakami cards scrape-murakami added since the last --delta run (its delta.json), --set filters the sets")
+    parser.add_argument("--missing", action="store_true", help="with --set, only the cards the catalog has no posting to this target for")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="sqlite card catalog, every created wish/item is recorded in it")
+    parser.add_argument("--update", action="store_true", help="with --sync, patch wishes/items whose fields differ from the csv")
+    parser.add_argument("--delete", action="store_true", help="with --sync, delete wishes/items that are no longer in the csv")
+    _koillection_arguments(parser)
+
+
+def _wish_arguments(parser, required=True):
+    parser.add_argument("--wishlist", required=required, help="wishlist url or id")
+    parser.add_argument("--format", choices=["pokemon", "murakami"], default="pokemon", help="which scraper wrote the csv")
+    parser.add_argument("--posted-csv", help="also write the posted cards with their new ids to this csv")
+
+
+def _post_wishes_arguments(parser):
+    _wish_arguments(parser)
+    parser.add_argument("--sync", action="store_true", help="only post cards missing from the wishlist")
+    _post_arguments(parser)
+
+
+def _post_items_arguments(parser):
+    parser.add_argument("--collection", required=True, help="collection url or id")
+    parser.add_argument("--sync", action="store_true", help="only post cards missing from the collection")
+    _item_data_arguments(parser)
+    _post_arguments(parser)
+
+
+def _sync_arguments(parser):
+    _wish_arguments(parser, required=False)
+    parser.add_argument("--collection", help="collection url or id, sync items instead of wishes")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be created, changed and deleted")
+    _item_data_arguments(parser)
+    _post_arguments(parser)
+
+
+def _client(args):
+    from name.koillection import DEFAULT_DOMAIN, KoillectionClient, read_credentials
+    from name.ratelimit import budget_from_args, limits_from_args
+    from name.replay import tape_from_args
+    from name.retry import retry_from_args
+    from name.tokens import TokenCache
+
+    try:
+        limits = limits_from_args(args)
+    except ValueError as e:
+        raise SystemExit(f"{PROG}: {e}")
+    retry_from_args(args)
+    tape_from_args(args)
+    username, password = read_credentials(args.credentials)
+    domain = args.domain or DEFAULT_DOMAIN
+    token_cache = TokenCache(args.token_cache) if args.token_cache else None
+    return KoillectionClient(username, password, domain, limits=limits, token_cache=token_cache, budget=budget_from_args(args, domain))
+
+
+def _post(args, resource):
+    from name.catalog import Catalog
+    from name.images import ImageCache
+    from name.journal import Journal, journal_path
+    from name.metrics import write_metrics
+    from name.posting import FORMATS, Target, item_data, load_cards_from_csv, post_cards, save_posted_cards, sync_target, target_iri
+    from name.transform import transformer_from_args
+    from name.validate import print_problems, validate_cards
+
+    if bool(args.csv) + bool(args.delta) + bool(args.set and not args.delta) != 1:
+        raise SystemExit(f"{PROG}: give one of a csv, --delta or --set")
+    if args.delta and args.delete:
+        raise SystemExit(f"{PROG}: --delete needs every card of the set, it cannot be combined with --delta")
+    # delta files only come from scrape-murakami
+    card_format = FORMATS[args.format] if resource == "wishes" and not args.delta else FORMATS["murakami"]
+    iri = target_iri(args.wishlist if resource == "wishes" else args.collection, "wishlists" if resource == "wishes" else "collections")
+    try:
+        data = item_data(args.item_data) if resource == "items" else ()
+    except ValueError as e:
+        raise SystemExit(f"{PROG}: {e}")
+    catalog = Catalog(args.catalog)
+    if args.csv:
+        source = args.csv
+        cards = load_cards_from_csv(args.csv)
+        print(f"[INFO] Found {len(cards)} card(s) to process.")
+    elif args.delta:
+        from name.kaikaikiki import load_delta
+
+        source = args.delta
+        cards = load_delta(args.delta, args.set)
+        print(f"[INFO] Found {len(cards)} new card(s) in {args.delta}")
+    else:
+        source = f"{args.catalog}.{'_'.join(args.set)}"
+        cards = catalog.cards(args.set, missing_from_target=iri if args.missing else None)
+        print(f"[INFO] Reading set(s) {', '.join(args.set)} from {args.catalog}")
+
+    cards, problems = validate_cards(cards, card_format, resource, data)
+    print_problems(problems, source)
+    if problems and args.strict:
+        catalog.close()
+        raise SystemExit(f"{PROG}: {len(problems)} row(s) failed validation, nothing was sent")
+
+    client = _client(args)
+    target = Target(resource, iri, card_format, None, source, catalog, data)
+    try:
+        if getattr(args, "dry_run", False):
+            # a sync that applies nothing, the plan summary is all that gets printed
+            sync_target(client, target, cards)
+            return
+
+        images = ImageCache(args.image_dir, args.image_cache_max_mb * 1024 * 1024)
+        target.journal = Journal(journal_path(source), resume=args.resume, target=iri)
+        if target.journal.foreign:
+            print(f"[WARN] {target.journal.path} has {target.journal.foreign} step(s) recorded for another wishlist/collection, they are posted again here")
+        transformer = transformer_from_args(args)
+        try:
+            jobs = post_cards(client, target, cards, images, transformer, sync=args.sync, update=args.update, delete=args.delete)
+            if args.delta:
+                from name.kaikaikiki import clear_delta
+
+                # cards a --sync found already posted count as taken too
+                failed = {job.card[card_format.key] for job in jobs if job.failed}
+                left = clear_delta(args.delta, [card[card_format.key] for card in cards if card[card_format.key] not in failed])
+                print(f"[INFO] {left} added card(s) left in {args.delta} for the next --delta run")
+            if resource == "wishes" and args.posted_csv:
+                save_posted_cards(jobs, card_format, args.posted_csv)
+        finally:
+            target.journal.close()
+            if transformer:
+                transformer.shutdown()
+    finally:
+        catalog.close()
+    write_metrics(args)
+
+
+def _sync(args):
+    if bool(args.wishlist) == bool(args.collection):
+        raise SystemExit(f"{PROG} sync: give exactly one of --wishlist or --collection")
+    args.sync = True
+    return _post(args, "wishes" if args.wishlist else "items")
+
+
+def _batch_arguments(parser):
+    from name.catalog import DEFAULT_CATALOG
+
+    parser.add_argument("manifest", help="toml file with one [[job]] table (csv plus wishlist or collection) per csv")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="sqlite card catalog, every created wish/item is recorded in it")
+    _item_data_arguments(parser)
+    _koillection_arguments(parser)
+
+
+def _batch(args):
+    from name.batch import load_manifest, run_batch
+    from name.catalog import Catalog
+    from name.images import ImageCache
+    from name.metrics import write_metrics
+    from name.transform import transformer_from_args
+
+    try:
+        entries = load_manifest(args.manifest)
+    except ValueError as e:
+        raise SystemExit(f"{PROG} batch: {e}")
+    client = _client(args)
+    transformer = transformer_from_args(args)
+    catalog = Catalog(args.catalog)
+    try:
+        run_batch(client, entries, ImageCache(args.image_dir, args.image_cache_max_mb * 1024 * 1024), transformer, resume=args.resume, catalog=catalog,
+                  strict=args.strict, default_item_data=args.item_data)
+    except ValueError as e:
+        raise SystemExit(f"{PROG} batch: {e}")
+    finally:
+        catalog.close()
+        if transformer:
+            transformer.shutdown()
+    write_metrics(args)
+
+
+def _catalog_command_arguments(parser):
+    from name.catalog import DEFAULT_CATALOG
+
+    parser.add_argument("action", choices=["import", "list"], help="import scraped csvs, or list cards")
+    parser.add_argument("csvs", nargs="*", help="csv files to import")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="sqlite card catalog")
+    parser.add_argument("--set", action="append", help="only list this set, can be repeated")
+    parser.add_argument("--missing-from", choices=["wishes", "items"], help="only list cards that are in no wishlist/collection yet")
+    parser.add_argument("--wishlist", help="with import, record the ids in --posted-csv files as postings to this wishlist url or id")
+
+
+def _catalog_command(args):
+    from name.catalog import Catalog, card_key, detect_format
+
+    with Catalog(args.catalog) as catalog:
+        if args.action == "import":
+            wishlist = None
+            if args.wishlist:
+                from name.posting import target_iri
+
+                try:
+                    wishlist = target_iri(args.wishlist, "wishlists")
+                except ValueError as e:
+                    raise SystemExit(f"{PROG} catalog: {e}")
+            for path in args.csvs:
+                try:
+                    print(f"[SUCCESS] Imported {catalog.import_csv(path, wishlist)} rows from {path}")
+                except ValueError as e:
+                    print(f"[SKIP] {e}")
+            return
+        for card in catalog.cards(args.set, missing_from_resource=args.missing_from):
+            format_name = detect_format(card)
+            set_code, card_id = card_key(card, format_name)
+            print(f"{set_code}\t{card_id}\t{card['Name' if format_name == 'pokemon' else 'name']}")
+
+
+def _validate_arguments(parser):
+    parser.add_argument("csvs", nargs="+", help="card csvs written by the scrape commands")
+    parser.add_argument("--items", action="store_true", help="check the columns post-items needs instead of post-wishes")
+    parser.add_argument("--output", help="clean csv to write, only with a single input (default: <csv>.clean.csv)")
+    _item_data_arguments(parser)
+
+
+def _validate(args):
+    import csv
+
+    from name.catalog import detect_format
+    from name.posting import FORMATS, item_data
+    from name.validate import clean_path, print_problems, validate_cards, write_clean_csv
+
+    if args.output and len(args.csvs) > 1:
+        raise SystemExit(f"{PROG} validate: --output needs a single csv")
+    try:
+        data = item_data(args.item_data)
+    except ValueError as e:
+        raise SystemExit(f"{PROG} validate: {e}")
+    failed = False
+    for path in args.csvs:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            try:
+                card_format = FORMATS[detect_format(reader.fieldnames)]
+            except ValueError as e:
+                raise SystemExit(f"{PROG} validate: {path}: {e}")
+            if args.items and card_format.kind != "murakami":
+                raise SystemExit(f"{PROG} validate: {path}: only murakami csvs can be posted as items")
+            cards, problems = validate_cards(reader, card_format, "items" if args.items else "wishes", data)
+            fieldnames = reader.fieldnames
+        print_problems(problems, path)
+        output = args.output or clean_path(path)
+        write_clean_csv(cards, fieldnames, output)
+        print(f"[SUCCESS] Wrote {len(cards)} clean row(s) to {output}")
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit(1)
+
+
+# name -> (help, add arguments, run)
+COMMANDS = {
+    "scrape-limitless": ("scrape a card set from limitlesstcg.com into a csv", _scrape_limitless_arguments, _scrape_limitless),
+    "scrape-murakami": ("scrape a kaikaikiki cardlist into one csv per set", _scrape_murakami_arguments, _scrape_murakami),
+    "post-wishes": ("post a card csv to a koillection wishlist", _post_wishes_arguments, lambda args: _post(args, "wishes")),
+    "post-items": ("post a murakami card csv to a koillection collection", _post_items_arguments, lambda args: _post(args, "items")),
+    "batch": ("post several csvs to their wishlists/collections in one run", _batch_arguments, _batch),
+    "catalog": ("import csvs into the sqlite card catalog or list what it holds", _catalog_command_arguments, _catalog_command),
+    "sync": ("post only the missing cards, optionally updating and deleting the rest", _sync_arguments, _sync),
+    "validate": ("check and normalize card csvs before posting them", _validate_arguments, _validate),
+}
+
+
+def build_parser(command, config=None):
+    description, add_arguments, _ = COMMANDS[command]
+    parser = argparse.ArgumentParser(prog=f"{PROG} {command}", description=description[0].upper() + description[1:])
+    add_arguments(parser)
+    if config:
+        shared, own = load_config(config, command)
+        known = {action.dest for action in parser._actions}
+        unknown = sorted(set(own) - known)
+        if unknown:
+            parser.error(f"unknown option(s) in [{command}] of {config}: {', '.join(unknown)}")
+        # shared keys meant for other commands are ignored
+        defaults = {**{key: value for key, value in shared.items() if key in known}, **own}
+        parser.set_defaults(**defaults)
+        for action in parser._actions:
+            # argparse checks required options against the command line only
+            if action.dest in defaults and action.option_strings:
+                action.required = False
+    return parser
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog=PROG,
+        description="Scrape trading card lists and post them to Koillection.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:18}{description}" for name, (description, _, _) in COMMANDS.items())
+               + f"\n\nrun `{PROG} <command> --help` for the options of a command",
+    )
+    parser.add_argument("--config", default=os.environ.get(CONFIG_ENV), help=f"toml file with option defaults (default: ${CONFIG_ENV})")
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="one of the commands below")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    top = parser.parse_args(argv)
+
+    # intermixed so options may sit between positionals, e.g. `catalog import a.csv --catalog x b.csv`
+    args = build_parser(top.command, top.config).parse_intermixed_args(top.args)
+    COMMANDS[top.command][2](args)
+    return 0
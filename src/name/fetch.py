@@ -0,0 +1,47 @@
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+from name.metrics import METRICS
+from name.replay import TapeAdapter
+
+DEFAULT_POOL_SIZE = 4
+
+_local = threading.local()
+
+
+def new_session(pool_size=DEFAULT_POOL_SIZE):
+    session = requests.Session()
+    # retries, the per-host circuit breaker and --record/--replay live in the adapter, so every caller of the session gets them
+    adapter = TapeAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(METRICS.record_response)
+    return session
+
+
+def thread_session():
+    # one keep-alive session per worker thread, requests.Session is not thread safe
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = new_session()
+    return session
+
+
+class HostLimiter:
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._slots.get(host)
+            if semaphore is None:
+                semaphore = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+        with semaphore:
+            yield
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+from name.cache import INDEX_FILE, TOUCH_BATCH, directory_lock, index_stamp, write_atomic
+from name.fetch import thread_session
+from name.options import DEFAULT_IMAGE_MAX_BYTES
+
+DEFAULT_IMAGE_DIR = "image"
+DEFAULT_MAX_BYTES = DEFAULT_IMAGE_MAX_BYTES
+
+
+def get_extension_from_url(url):
+    parsed = urlparse(url)
+    if '.' in parsed.path:
+        return os.path.splitext(parsed.path)[1]
+    return ".jpg"
+
+
+class ImageCache:
+    # urls map to content hashes and blobs are stored once per content hash,
+    # so cards sharing a name or an image never clobber or duplicate each other
+    def __init__(self, directory=DEFAULT_IMAGE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._urls, self._blobs = {}, {}
+        self._stamp = None
+        self._touched = {}
+        self._refresh()
+
+    def _load_index(self):
+        try:
+            with open(self.directory / INDEX_FILE, encoding="utf-8") as f:
+                index = json.load(f)
+            return index["urls"], index["blobs"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return {}, {}
+
+    def _refresh(self):
+        # under self._lock; picks up what other runs stored without taking the directory lock
+        stamp = index_stamp(self.directory / INDEX_FILE)
+        if stamp != self._stamp:
+            (self._urls, self._blobs), self._stamp = self._load_index(), stamp
+
+    @contextmanager
+    def _updating_index(self):
+        # posting runs side by side share the image directory: reload the index under the lock, change it, write it back
+        with self._lock, directory_lock(self.directory):
+            self._urls, self._blobs = self._load_index()
+            for digest, used in self._touched.items():
+                if digest in self._blobs:
+                    self._blobs[digest]["used"] = max(self._blobs[digest]["used"], used)
+            self._touched = {}
+            yield
+            write_atomic(self.directory / INDEX_FILE, json.dumps({"urls": self._urls, "blobs": self._blobs}).encode("utf-8"))
+            self._stamp = index_stamp(self.directory / INDEX_FILE)
+
+    def _lookup(self, url):
+        with self._lock:
+            self._refresh()
+            digest = self._urls.get(hashlib.sha256(url.encode("utf-8")).hexdigest())
+            blob = self._blobs.get(digest) if digest else None
+            # a missing file is replaced by the download that follows
+            if blob is None or not (self.directory / blob["file"]).exists():
+                return None
+            self._touched[digest] = time.time()
+            flush = len(self._touched) >= TOUCH_BATCH
+        if flush:
+            with self._updating_index():
+                pass
+        return str(self.directory / blob["file"])
+
+    def _store(self, url, content):
+        digest = hashlib.sha256(content).hexdigest()
+        with self._updating_index():
+            blob = self._blobs.get(digest)
+            if blob is None or not (self.directory / blob["file"]).exists():
+                blob = {"file": digest + get_extension_from_url(url), "size": len(content)}
+                write_atomic(self.directory / blob["file"], content)
+                self._blobs[digest] = blob
+            blob["used"] = time.time()
+            self._urls[hashlib.sha256(url.encode("utf-8")).hexdigest()] = digest
+            self._evict(keep=digest)
+            return str(self.directory / blob["file"])
+
+    def _evict(self, keep):
+        total = sum(blob["size"] for blob in self._blobs.values())
+        for digest in sorted(self._blobs, key=lambda d: self._blobs[d]["used"]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            blob = self._blobs.pop(digest)
+            total -= blob["size"]
+            (self.directory / blob["file"]).unlink(missing_ok=True)
+        dropped = set(self._urls.values()) - set(self._blobs)
+        self._urls = {key: digest for key, digest in self._urls.items() if digest not in dropped}
+
+    def fetch(self, url, session=None):
+        path = self._lookup(url)
+        if path:
+            return path, True
+        response = (session or thread_session()).get(url)
+        response.raise_for_status()
+        return self._store(url, response.content), False
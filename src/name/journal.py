@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+
+
+class Journal:
+    # append-only record of finished (card, stage) steps, fsynced per line so a crash loses at most the step in flight.
+    # every line names the wishlist/collection it was posted to, and resuming only trusts the lines of the same target
+    def __init__(self, path, resume=False, target=None):
+        self.path = path
+        self.target = target
+        self.foreign = 0  # steps of other targets found while resuming, they are ignored
+        self._lock = threading.Lock()
+        self._entries = {}
+        if resume:
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # a torn last line from a crash mid-write
+                        continue
+                    # lines from before targets were recorded can only be taken at their word
+                    if entry.get("target", self.target) != self.target:
+                        self.foreign += 1
+                        continue
+                    self._entries[(entry["card"], entry["stage"])] = entry["value"]
+        except FileNotFoundError:
+            pass
+
+    def get(self, card, stage):
+        with self._lock:
+            return self._entries.get((card, stage))
+
+    def done(self, card, stage):
+        with self._lock:
+            return (card, stage) in self._entries
+
+    def record(self, card, stage, value=True):
+        line = json.dumps({"card": card, "stage": stage, "value": value, "target": self.target}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._entries[(card, stage)] = value
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def journal_path(csv_file):
+    return f"{csv_file}.journal"
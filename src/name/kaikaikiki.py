@@ -0,0 +1,206 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+
+from lxml import etree
+
+from name.metrics import METRICS
+
+CARD_FIELDS = ["id", "name", "image_url", "description", "rarity"]
+# cardlist page, image host, set prefixes and csv filename prefix of each murakami tcg site
+SITES = {
+    "classic": {
+        "url": "https://mfctc.kaikaikiki.com/cardlist.html",
+        "img_base": "https://mfctc.kaikaikiki.com",
+        "sets": ["PR", "SP", "TKPR", "CMAPR", "TCB", "FGW", "MKJW"],
+        "prefix": "",
+    },
+    "mononoke": {
+        "url": "https://mmktc.kaikaikiki.com/cardlist.html",
+        "img_base": "https://mmktc.kaikaikiki.com",
+        "sets": ["MMK", "MMKPR", "MMKTC", "MKJW"],
+        "prefix": "mononoke_",
+    },
+}
+
+# all lookups are relative to the modal div, so each one only walks that card's subtree
+_IMAGE = etree.XPath(".//img")
+_TITLE_JP = etree.XPath(".//div[@class='p-modalHead']//div[@class='p-modalHeadTitle is-jp']")
+_TITLE = etree.XPath(".//div[@class='p-modalHead']//div[@class='p-modalHeadTitle']")
+_DESC_JP = etree.XPath(".//div[@class='p-modalContent']/p[1]")
+_DESC = etree.XPath(".//div[@class='p-modalInner']//div[@class='p-modalImg']//p[@class='p-modalContent__txt is-jp']")
+_RARITY = etree.XPath(".//div[@class='p-modalHead']//div[@class='p-modalHeadInfo']//div[contains(@class, 'p-modalHeadInfo__rare')]")
+# text nodes and <br> elements come back interleaved in document order
+_DESC_PARTS = etree.XPath(".//text() | .//br")
+
+
+def _first_text(elements, default):
+    return elements[0].text_content().strip() if elements else default
+
+
+def _description(elements):
+    if not elements:
+        return ""
+    parts = ["\n" if isinstance(part, etree._Element) else part for part in _DESC_PARTS(elements[0])]
+    lines = "".join(parts).splitlines()
+    return "\n".join(line.strip() for line in lines if line.strip() != '')
+
+
+def parse_cardlist(doc, sets, img_base):
+    with METRICS.phase("parse"):
+        return _parse_cardlist(doc, sets, img_base)
+
+
+def _parse_cardlist(doc, sets, img_base):
+    id_pattern = re.compile("(" + "|".join(map(re.escape, sets)) + r")-\d{3}")
+    cards_by_set = {s: {} for s in sets}
+
+    for div in doc.iter("div"):
+        full_id = div.get("id")  # e.g., PR-001R, JP_PR-001
+        if not full_id:
+            continue
+
+        match = id_pattern.search(full_id)
+        if not match:
+            continue
+
+        canonical_id = match.group(0)
+        set_prefix = match.group(1)
+        if canonical_id in cards_by_set[set_prefix]:
+            continue
+
+        img_elem = _IMAGE(div)
+        if not img_elem:
+            continue
+        img_src = img_elem[0].get("src")
+        if img_src and not img_src.startswith("http"):
+            img_src = img_base + img_src
+
+        cards_by_set[set_prefix][canonical_id] = {
+            "id": canonical_id,
+            "name": _first_text(_TITLE_JP(div) or _TITLE(div), "N/A"),
+            "image_url": img_src,
+            "description": _description(_DESC_JP(div) or _DESC(div)),
+            "rarity": _first_text(_RARITY(div), "n/a"),
+        }
+
+    return cards_by_set
+
+
+def card_hash(card):
+    # whitespace and unicode normalised, so a re-rendered page with the same cards hashes the same
+    normalized = [
+        "\n".join(" ".join(line.split()) for line in unicodedata.normalize("NFC", card.get(field) or "").splitlines()).strip()
+        for field in CARD_FIELDS
+    ]
+    return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def read_set_csv(filename):
+    try:
+        with open(filename, newline="", encoding="utf-8") as f:
+            return {card["id"]: card for card in csv.DictReader(f)}
+    except FileNotFoundError:
+        return {}
+
+
+def diff_cards(old, new):
+    old_hashes = {card_id: card_hash(card) for card_id, card in old.items()}
+    return {
+        "added": [card for card_id, card in new.items() if card_id not in old],
+        "changed": [card for card_id, card in new.items() if card_id in old and card_hash(card) != old_hashes[card_id]],
+        "removed": [card_id for card_id in old if card_id not in new],
+    }
+
+
+def write_set_csvs(cards_by_set, filename_prefix=""):
+    # the csv written by the previous run is the snapshot, sets without a delta are left untouched
+    deltas = {}
+    for set_prefix, cards in cards_by_set.items():
+        filename = f"{filename_prefix}{set_prefix}.csv"
+        # an emptied set still reports its cards as removed, but no header-only csv replaces the old one
+        delta = deltas[set_prefix] = diff_cards(read_set_csv(filename), cards)
+        if not cards:
+            if delta["removed"]:
+                print(f"⚠️ {set_prefix} has no cards anymore, {filename} is kept ({len(delta['removed'])} removed)")
+            continue
+        if os.path.exists(filename) and not any(delta.values()):
+            print(f"✅ {filename} is unchanged ({len(cards)} cards)")
+            continue
+        tmp = filename + ".tmp"
+        with METRICS.phase("csv"), open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CARD_FIELDS)
+            writer.writeheader()
+            writer.writerows(cards.values())
+        os.replace(tmp, filename)
+        print(f"✅ Wrote {len(cards)} cards to {filename} "
+              f"({len(delta['added'])} added, {len(delta['changed'])} changed, {len(delta['removed'])} removed)")
+    return deltas
+
+
+def delta_path(filename_prefix=""):
+    return f"{filename_prefix}delta.json"
+
+
+def merge_delta(old, new):
+    # entries of earlier runs stay until a posting run takes them, a newer entry of the same card replaces the older one
+    added = {card["id"]: card for card in old["added"]}
+    changed = {card["id"]: card for card in old["changed"]}
+    removed = dict.fromkeys(old["removed"])
+    for card in new["added"]:
+        removed.pop(card["id"], None)
+        added[card["id"]] = card
+    for card in new["changed"]:
+        # a card that was never posted is still posted as new, just with its latest fields
+        (added if card["id"] in added else changed)[card["id"]] = card
+    for card_id in new["removed"]:
+        added.pop(card_id, None)
+        changed.pop(card_id, None)
+        removed[card_id] = None
+    return {"added": list(added.values()), "changed": list(changed.values()), "removed": list(removed)}
+
+
+def _read_delta(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["sets"]
+    except FileNotFoundError:
+        return {}
+
+
+def _save_delta(deltas, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"generated": time.time(), "sets": deltas}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def write_delta(deltas, path):
+    # merged into the delta file of earlier runs, so a scrape before the posting run doesn't lose their added cards
+    merged = _read_delta(path)
+    empty = {"added": [], "changed": [], "removed": []}
+    for set_prefix, delta in deltas.items():
+        merged[set_prefix] = merge_delta(merged.get(set_prefix, empty), delta)
+    _save_delta(merged, path)
+    return merged
+
+
+def load_delta(path, sets=None):
+    # the cards a posting run needs from a delta file: the added ones, optionally only of some sets
+    with open(path, encoding="utf-8") as f:
+        deltas = json.load(f)["sets"]
+    return [card for set_prefix, delta in deltas.items() if not sets or set_prefix in sets for card in delta["added"]]
+
+
+def clear_delta(path, posted_ids):
+    # drops the added cards a posting run got through, the rest stay for the next --delta run
+    posted_ids = set(posted_ids)
+    deltas = _read_delta(path)
+    for delta in deltas.values():
+        delta["added"] = [card for card in delta["added"] if card["id"] not in posted_ids]
+    _save_delta(deltas, path)
+    return sum(len(delta["added"]) for delta in deltas.values())
@@ -0,0 +1,166 @@
+import base64
+import json
+import threading
+import time
+
+import requests
+
+from name.fetch import new_session
+from name.metrics import METRICS
+from name.ratelimit import THROTTLE_STATUSES, EndpointLimits, SharedRateBudget
+from name.tokens import TokenCache
+
+DEFAULT_DOMAIN = "https://swag.swarsel.win"
+VISIBILITY = "public"
+# refresh this many seconds before the token's exp claim so in-flight requests don't race it
+TOKEN_REFRESH_MARGIN = 60
+MAX_THROTTLE_RETRIES = 5
+# enough keep-alive connections for every posting stage and per-item datum running at once
+POOL_SIZE = 16
+
+
+def read_credentials(filepath="credentials.txt"):
+    username = password = None
+
+    with open(filepath, "r") as file:
+        for line in file:
+            if line.startswith("username:"):
+                username = line.split(":", 1)[1].strip()
+            elif line.startswith("password:"):
+                password = line.split(":", 1)[1].strip()
+
+    if not username or not password:
+        raise ValueError("Credentials file is missing username or password.")
+
+    return username, password
+
+
+def token_expiry(token: str) -> float | None:
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def print_response_body(error: requests.RequestException, log=print) -> None:
+    if error.response is not None:
+        try:
+            log(error.response.content.decode())
+        except Exception:
+            pass
+
+
+class KoillectionClient:
+    def __init__(self, username: str, password: str, domain: str = DEFAULT_DOMAIN, session: requests.Session | None = None,
+                 limits: EndpointLimits | None = None, token_cache: TokenCache | None = None,
+                 budget: SharedRateBudget | None = None):
+        self.domain = domain
+        self.username = username
+        self.password = password
+        self.session = session or new_session(POOL_SIZE)
+        self.limits = limits or EndpointLimits()
+        self.token_cache = token_cache
+        self.budget = budget
+        self.token = None
+        self.expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def authenticate(self) -> str:
+        response = self.session.post(
+            f"{self.domain}/api/authentication_token",
+            json={"username": self.username, "password": self.password},
+        )
+        response.raise_for_status()
+        self.token = response.json().get("token")
+        # tokens without a readable exp claim are only replaced after a 401
+        self.expires_at = token_expiry(self.token) or float("inf")
+        print("Authenticated")
+        return self.token
+
+    def _usable(self, token: str | None, expires_at: float, stale: str | None) -> bool:
+        return token is not None and token != stale and time.time() < expires_at - TOKEN_REFRESH_MARGIN
+
+    def _current_token(self, stale: str | None = None) -> str:
+        with self._lock:
+            if not self._usable(self.token, self.expires_at, stale):
+                if self.token_cache is None:
+                    self.authenticate()
+                else:
+                    entry = self.token_cache.token(
+                        f"{self.username}@{self.domain}",
+                        lambda entry: self._usable(entry["token"], entry["expires_at"] or float("inf"), stale),
+                        lambda: (self.authenticate(), token_expiry(self.token)),
+                    )
+                    self.token, self.expires_at = entry["token"], entry["expires_at"] or float("inf")
+            return self.token
+
+    def _send(self, method: str, path: str, headers: dict, files: dict | None, **kwargs) -> requests.Response:
+        opened = {field: open(file_path, "rb") for field, file_path in files.items()} if files else None
+        try:
+            return self.session.request(method, f"{self.domain}{path}", headers=headers, files=opened, **kwargs)
+        finally:
+            for handle in (opened or {}).values():
+                handle.close()
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        limiter = self.limits.for_path(path)
+        token = self._current_token()
+        headers = dict(kwargs.pop("headers", {}))
+        files = kwargs.pop("files", None)
+        reauthenticated = False
+        throttled = 0
+        while True:
+            headers["Authorization"] = f"Bearer {token}"
+            limiter.acquire()
+            if self.budget:
+                self.budget.acquire()
+            started = time.monotonic()
+            response = self._send(method, path, headers, files, **kwargs)
+            limiter.feedback(response.status_code, time.monotonic() - started, response.headers.get("Retry-After"))
+            if self.budget:
+                self.budget.feedback(response.status_code, response.headers.get("Retry-After"))
+            if response.status_code == 401 and not reauthenticated:
+                reauthenticated = True
+                METRICS.count_retry(path, "unauthorized")
+                token = self._current_token(stale=token)
+            elif response.status_code in THROTTLE_STATUSES and throttled < MAX_THROTTLE_RETRIES:
+                # the server refused the request outright, so sending it again cannot duplicate anything
+                throttled += 1
+                METRICS.count_retry(path, str(response.status_code))
+            else:
+                break
+        response.raise_for_status()
+        return response
+
+    def get(self, path: str, params: dict | None = None) -> dict:
+        return self.request("GET", path, params=params, headers={"Accept": "application/ld+json"}).json()
+
+    def update(self, resource: str, object_id: str, fields: dict) -> None:
+        self.request("PATCH", f"/api/{resource}/{object_id}", json=fields, headers={"Content-Type": "application/merge-patch+json"})
+
+    def delete(self, resource: str, object_id: str) -> None:
+        self.request("DELETE", f"/api/{resource}/{object_id}")
+
+    def _create(self, path: str, payload: dict) -> str:
+        return self.request("POST", path, json=payload).json().get("id")
+
+    def create_wish(self, payload: dict) -> str:
+        return self._create("/api/wishes", payload)
+
+    def create_item(self, payload: dict) -> str:
+        return self._create("/api/items", payload)
+
+    def create_datum(self, item_id: str, label: str, value: str, datum_type: str = "text", visibility: str = VISIBILITY) -> str:
+        return self._create("/api/data", {
+            "item": f"/api/items/{item_id}",
+            "type": datum_type,
+            "label": label,
+            "value": value,
+            "visibility": visibility,
+        })
+
+    def upload_image(self, resource: str, object_id: str, image_path: str) -> None:
+        # resource is the api collection name, "wishes" or "items"
+        self.request("POST", f"/api/{resource}/{object_id}/image", files={"file": image_path})
@@ -0,0 +1,150 @@
+import csv
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+from lxml import etree, html
+
+from name.fetch import HostLimiter, thread_session
+from name.metrics import METRICS
+from name.options import CSV_FIELDS, DEFAULT_PER_HOST, DEFAULT_WORKERS
+
+BASE_URL = "https://limitlesstcg.com"
+# what the set index page already shows for every card, and what one card page tells about the whole set
+INDEX_FIELDS = {"URL", "Image URL", "Name"}
+SET_FIELDS = {"Set"}
+
+CARD_FIELDS = {
+    "Image URL": etree.XPath("//img[@class='card shadow resp-w']/@src"),
+    "Name": etree.XPath("/html[1]/body[1]/main[1]/div[1]/section[1]/div[1]/div[2]/div[1]/div[1]/div[1]/p[1]/span[1]/a[1]/text()"),
+    "Number": etree.XPath("/html[1]/body[1]/main[1]/div[1]/section[1]/div[2]/div[1]/a[1]/div[1]/span[2]/text()"),
+    "Set": etree.XPath("//span[@class='text-lg']/text()"),
+    "Price": etree.XPath("/html/body/main/div/section[2]/div[2]/a[2]/span/text()"),
+}
+
+
+_INDEX_LINKS = etree.XPath("//a[@href][.//img]")
+
+
+def card_urls(set_code, count, base=BASE_URL):
+    return [f"{base}/cards/{set_code}/{number}" for number in range(1, count + 1)]
+
+
+def set_url(set_code, base=BASE_URL):
+    return f"{base}/cards/{set_code}"
+
+
+def parse_set_index(content, url, set_code):
+    # every image link to a card of this set, in page order; secret rares and gaps included
+    tree = html.fromstring(content)
+    card_path = re.compile(rf"^/cards/{re.escape(set_code)}/[^/]+$")
+    cards = {}
+    for link in _INDEX_LINKS(tree):
+        card_url = urljoin(url, link.get("href"))
+        if not card_path.match(urlparse(card_url).path) or card_url in cards:
+            continue
+        image = link.find(".//img")
+        cards[card_url] = {
+            "URL": card_url,
+            "Image URL": (image.get("src") or image.get("data-src") or "").strip(),
+            "Name": (image.get("alt") or link.text_content()).strip(),
+        }
+    return list(cards.values())
+
+
+def parse_card(content, url):
+    with METRICS.phase("parse"):
+        return _parse_card(content, url)
+
+
+def _parse_card(content, url):
+    tree = html.fromstring(content)
+
+    def safe_xpath(xpath, default=""):
+        try:
+            return xpath(tree)[0].strip()
+        except (IndexError, AttributeError):
+            return default
+
+    card = {"URL": url}
+    card.update((field, safe_xpath(xpath)) for field, xpath in CARD_FIELDS.items())
+    # drop the currency sign
+    card["Price"] = card["Price"][1:]
+    return card
+
+
+def _fetch(url, session=None, cache=None):
+    if cache:
+        return cache.get(url, session)
+    response = (session or thread_session()).get(url)
+    response.raise_for_status()
+    return response.content
+
+
+def fetch_and_extract(url, session=None, cache=None):
+    try:
+        content = _fetch(url, session, cache)
+    except requests.RequestException as e:
+        print(f"[ERROR] Fetching {url}: {e}")
+        return None
+
+    try:
+        return parse_card(content, url)
+    except etree.LxmlError as e:
+        # an empty or garbled page only loses its own row
+        print(f"[ERROR] Parsing {url}: {e}")
+        return None
+
+
+def scrape(urls, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, cache=None):
+    limiter = HostLimiter(per_host)
+
+    def work(url):
+        with limiter.slot(url):
+            print(f"[INFO] Processing: {url}")
+            return fetch_and_extract(url, thread_session(), cache)
+
+    # map keeps the results in card number order regardless of completion order
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [data for data in pool.map(work, urls) if data]
+
+
+def scrape_set(set_code, fields=CSV_FIELDS, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, cache=None, base=BASE_URL):
+    # one request for the index, then card pages only for the fields the index doesn't have
+    index_url = set_url(set_code, base)
+    print(f"[INFO] Processing: {index_url}")
+    try:
+        with METRICS.phase("download"):
+            content = _fetch(index_url, thread_session(), cache)
+    except requests.RequestException as e:
+        print(f"[ERROR] Fetching {index_url}: {e}")
+        return []
+    try:
+        with METRICS.phase("parse"):
+            cards = parse_set_index(content, index_url, set_code)
+    except etree.LxmlError as e:
+        print(f"[ERROR] Parsing {index_url}: {e}")
+        return []
+    print(f"[INFO] {index_url} lists {len(cards)} cards")
+
+    missing = set(fields) - INDEX_FIELDS
+    if missing - SET_FIELDS:
+        details = {card["URL"]: card for card in scrape([card["URL"] for card in cards], workers, per_host, cache)}
+        # a card whose page couldn't be fetched or parsed is dropped, like scrape() drops it
+        cards = [card for card in cards if card["URL"] in details]
+        for card in cards:
+            detail = details[card["URL"]]
+            card.update((field, value) for field, value in detail.items() if field not in INDEX_FIELDS or not card.get(field))
+    elif missing and cards:
+        first = fetch_and_extract(cards[0]["URL"], thread_session(), cache) or {}
+        for card in cards:
+            card.update((field, first.get(field, "")) for field in missing)
+    return [{field: card.get(field, "") for field in fields} for card in cards]
+
+
+def write_cards_csv(cards, csv_file):
+    with METRICS.phase("csv"), open(csv_file, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=cards[0].keys())
+        writer.writeheader()
+        writer.writerows(cards)
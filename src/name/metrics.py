@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from name.ratelimit import endpoint_key
+
+# upper bounds in seconds, wide enough for a cached page and a slow image upload alike
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "koillection_tools"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip([*self.buckets, float("inf")], self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    # everything is keyed by a tuple of label values so the two exports can share one pass
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.latency = {}  # (host, endpoint) -> Histogram
+        self.requests = {}  # (host, endpoint, status) -> count
+        self.bytes = {}  # (host, endpoint, direction) -> bytes
+        self.retries = {}  # (endpoint, reason) -> count
+        self.phases = {}  # phase -> [seconds, runs]
+
+    def observe_request(self, url, status, seconds, sent=0, received=0):
+        parsed = urlparse(url)
+        host, endpoint = parsed.netloc, endpoint_key(parsed.path)
+        with self._lock:
+            histogram = self.latency.get((host, endpoint))
+            if histogram is None:
+                histogram = self.latency[(host, endpoint)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            key = (host, endpoint, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for direction, size in (("out", sent), ("in", received)):
+                key = (host, endpoint, direction)
+                self.bytes[key] = self.bytes.get(key, 0) + size
+
+    def record_response(self, response, *args, **kwargs):
+        # requests response hook, the signature is (response, **send kwargs)
+        body = response.request.body
+        sent = len(body) if isinstance(body, (bytes, str)) else 0
+        if kwargs.get("stream"):
+            # reading the body here would defeat the caller's streaming, trust the header instead
+            received = int(response.headers.get("Content-Length") or 0)
+        else:
+            received = len(response.content)
+        self.observe_request(response.url, response.status_code, response.elapsed.total_seconds(), sent, received)
+
+    def count_retry(self, path, reason):
+        key = (endpoint_key(path), reason)
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    @contextmanager
+    def phase(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                totals = self.phases.setdefault(name, [0.0, 0])
+                totals[0] += elapsed
+                totals[1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "duration_seconds": time.time() - self.started,
+                "requests": [
+                    {
+                        "host": host,
+                        "endpoint": endpoint,
+                        "count": histogram.count,
+                        "seconds": histogram.sum,
+                        "buckets": {str(bound): count for bound, count in histogram.cumulative()},
+                        "statuses": {status: count for (h, e, status), count in self.requests.items() if (h, e) == (host, endpoint)},
+                        "bytes_out": self.bytes.get((host, endpoint, "out"), 0),
+                        "bytes_in": self.bytes.get((host, endpoint, "in"), 0),
+                    }
+                    for (host, endpoint), histogram in sorted(self.latency.items())
+                ],
+                "retries": [{"endpoint": endpoint, "reason": reason, "count": count}
+                            for (endpoint, reason), count in sorted(self.retries.items())],
+                "phases": {name: {"seconds": seconds, "runs": runs} for name, (seconds, runs) in sorted(self.phases.items())},
+            }
+
+    def prometheus(self):
+        data = self.snapshot()
+        lines = [
+            f"# HELP {PREFIX}_request_seconds HTTP request latency until the response headers arrived.",
+            f"# TYPE {PREFIX}_request_seconds histogram",
+        ]
+        for entry in data["requests"]:
+            labels = f'host="{entry["host"]}",endpoint="{entry["endpoint"]}"'
+            for bound, count in entry["buckets"].items():
+                le = "+Inf" if bound == "inf" else bound
+                lines.append(f'{PREFIX}_request_seconds_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"{PREFIX}_request_seconds_sum{{{labels}}} {entry['seconds']}")
+            lines.append(f"{PREFIX}_request_seconds_count{{{labels}}} {entry['count']}")
+        lines += [f"# HELP {PREFIX}_requests_total HTTP responses by status code.", f"# TYPE {PREFIX}_requests_total counter"]
+        for entry in data["requests"]:
+            for status, count in entry["statuses"].items():
+                lines.append(f'{PREFIX}_requests_total{{host="{entry["host"]}",endpoint="{entry["endpoint"]}",status="{status}"}} {count}')
+        lines += [f"# HELP {PREFIX}_bytes_total Request and response body bytes.", f"# TYPE {PREFIX}_bytes_total counter"]
+        for entry in data["requests"]:
+            for direction in ("out", "in"):
+                lines.append(f'{PREFIX}_bytes_total{{host="{entry["host"]}",endpoint="{entry["endpoint"]}",direction="{direction}"}} {entry["bytes_" + direction]}')
+        lines += [f"# HELP {PREFIX}_retries_total Requests sent again after a throttle or an expired token.", f"# TYPE {PREFIX}_retries_total counter"]
+        for entry in data["retries"]:
+            lines.append(f'{PREFIX}_retries_total{{endpoint="{entry["endpoint"]}",reason="{entry["reason"]}"}} {entry["count"]}')
+        lines += [f"# HELP {PREFIX}_phase_seconds_total Wall time spent in each phase, summed over workers.", f"# TYPE {PREFIX}_phase_seconds_total counter"]
+        for name, totals in data["phases"].items():
+            lines.append(f'{PREFIX}_phase_seconds_total{{phase="{name}"}} {totals["seconds"]}')
+        lines += [f"# HELP {PREFIX}_phase_runs_total Times each phase ran.", f"# TYPE {PREFIX}_phase_runs_total counter"]
+        for name, totals in data["phases"].items():
+            lines.append(f'{PREFIX}_phase_runs_total{{phase="{name}"}} {totals["runs"]}')
+        lines.append(f"{PREFIX}_run_duration_seconds {data['duration_seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2))
+
+    def write_prometheus(self, path):
+        _write_atomic(path, self.prometheus())
+
+
+def _write_atomic(path, text):
+    # the node exporter textfile collector may read at any moment, so never expose a half written file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# one registry per process, sessions from name.fetch report into it
+METRICS = Metrics()
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics-json", metavar="PATH", help="write request, retry and phase metrics as json at the end of the run")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="write the same metrics as a prometheus textfile")
+
+
+def write_metrics(args, metrics=METRICS):
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
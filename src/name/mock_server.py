@@ -0,0 +1,179 @@
+import base64
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE_SIZE = 30
+# a 1x1 transparent png, enough for the posting scripts to download and re-upload
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+_CREATE = re.compile(r"^/api/(wishes|items|data)$")
+_IMAGE = re.compile(r"^/api/(wishes|items)/([\w-]+)/image$")
+_OBJECT = re.compile(r"^/api/(wishes|items)/([\w-]+)$")
+_LIST = re.compile(r"^/api/(wishlists|collections|items)/([\w-]+)/(wishes|items|data)$")
+_PARENT = {"wishes": "wishlist", "items": "collection", "data": "item"}
+
+
+def make_token(ttl):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode({'exp': int(time.time() + ttl), 'jti': uuid.uuid4().hex})}.mock"
+
+
+# stand-in for the koillection endpoints the posting scripts use, with tunable latency, errors and throttling
+class MockKoillection:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, retry_after=1, token_ttl=3600, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.token_ttl = token_ttl
+        self.records = {"wishes": {}, "items": {}, "data": {}}
+        self.images = {}
+        self.log = []
+        self._tokens = set()
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host="127.0.0.1", port=0):
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _throttled(self):
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                return True
+            self._recent.append(now)
+            return False
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="application/json", headers=None):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                return status
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _handle(self):
+                started = time.monotonic()
+                path, _, query = self.path.partition("?")
+                body = self._body()
+                status, object_id = self._route(path, query, body)
+                with mock._lock:
+                    mock.log.append({
+                        "method": self.command,
+                        "path": path,
+                        "status": status,
+                        "id": object_id,
+                        "start": started,
+                        "end": time.monotonic(),
+                    })
+
+            def _route(self, path, query, body):
+                if path.startswith("/images/"):
+                    return self._send(200, PNG, "image/png"), None
+                if mock.latency or mock.jitter:
+                    time.sleep(mock.latency + mock._random.uniform(0, mock.jitter))
+                if mock._throttled():
+                    return self._send(429, {"detail": "slow down"}, headers={"Retry-After": str(mock.retry_after)}), None
+                if mock.error_rate and mock._random.random() < mock.error_rate:
+                    return self._send(500, {"detail": "injected failure"}), None
+
+                if path == "/api/authentication_token" and self.command == "POST":
+                    token = make_token(mock.token_ttl)
+                    with mock._lock:
+                        mock._tokens.add(token)
+                    return self._send(200, {"token": token}), None
+
+                auth = self.headers.get("Authorization", "")
+                with mock._lock:
+                    authorized = auth.removeprefix("Bearer ") in mock._tokens
+                if not authorized:
+                    return self._send(401, {"message": "Invalid JWT Token"}), None
+
+                if (match := _CREATE.match(path)) and self.command == "POST":
+                    resource = match.group(1)
+                    record = {**json.loads(body or b"{}"), "id": str(uuid.uuid4())}
+                    with mock._lock:
+                        mock.records[resource][record["id"]] = record
+                    return self._send(201, record), record["item"].rsplit("/", 1)[-1] if resource == "data" else record["id"]
+                if (match := _IMAGE.match(path)) and self.command == "POST":
+                    with mock._lock:
+                        mock.images[match.group(2)] = len(body)
+                    return self._send(201, {"id": match.group(2)}), match.group(2)
+                if (match := _OBJECT.match(path)) and self.command in ("PATCH", "DELETE"):
+                    resource, object_id = match.groups()
+                    with mock._lock:
+                        if object_id not in mock.records[resource]:
+                            return self._send(404, {"detail": "Not Found"}), object_id
+                        if self.command == "DELETE":
+                            del mock.records[resource][object_id]
+                            return self._send(204), object_id
+                        mock.records[resource][object_id].update(json.loads(body or b"{}"))
+                        return self._send(200, mock.records[resource][object_id]), object_id
+                if (match := _LIST.match(path)) and self.command == "GET":
+                    parent, parent_id, resource = match.groups()
+                    page = int(dict(part.split("=", 1) for part in query.split("&") if "=" in part).get("page", 1))
+                    with mock._lock:
+                        members = [record for record in mock.records[resource].values()
+                                   if record.get(_PARENT[resource]) == f"/api/{parent}/{parent_id}"]
+                    return self._send(200, {
+                        "hydra:member": members[(page - 1) * PAGE_SIZE:page * PAGE_SIZE],
+                        "hydra:totalItems": len(members),
+                    }, "application/ld+json"), None
+                return self._send(404, {"detail": "Not Found"}), None
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+        return Handler
@@ -0,0 +1,71 @@
+import argparse
+
+# defaults and argument helpers of the modules that import requests or lxml, kept apart so that
+# building a command's parser (and so `--help` or a bad flag) loads neither
+
+# name.cache
+DEFAULT_CACHE_DIR = ".cache/http"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# name.images
+DEFAULT_IMAGE_MAX_BYTES = 1024 * 1024 * 1024
+
+# name.limitless
+DEFAULT_WORKERS = 4
+DEFAULT_PER_HOST = 4
+CSV_FIELDS = ["URL", "Image URL", "Name", "Number", "Set", "Price"]
+
+# name.posting, label -> csv column of every datum attached to an item; items are matched by their "Set Number" on sync
+DEFAULT_ITEM_DATA = {
+    "Set Number": "id",
+    "Description": "description",
+    "Rarity": "rarity",
+}
+
+# name.retry
+DEFAULT_RETRY = {
+    "attempts": 4,
+    "base_delay": 0.5,  # seconds, doubled on every attempt
+    "max_delay": 30.0,
+}
+DEFAULT_BREAKER = {
+    "threshold": 5,  # consecutive failures before a host counts as down
+    "cooldown": 5.0,  # seconds until the first probe, doubled after every failed probe
+    "max_cooldown": 60.0,
+    "max_down": 300.0,  # once a host has been down this long, callers other than the probe fail instead of waiting
+}
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="directory for cached responses")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024), help="cache size cap, least recently used pages are evicted first")
+    parser.add_argument("--offline", action="store_true", help="only serve pages from the cache, never touch the network")
+
+
+def add_retry_arguments(parser):
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRY["attempts"],
+                        help="attempts per request on connection errors and 5xx, creates only retry when nothing was sent (default: %(default)s)")
+    parser.add_argument("--breaker-threshold", type=int, default=DEFAULT_BREAKER["threshold"],
+                        help="consecutive failures after which a host is paused (default: %(default)s)")
+
+
+def add_tape_arguments(parser):
+    parser.add_argument("--record", metavar="PATH", help="save every request and response of this run to a gzipped archive")
+    parser.add_argument("--replay", metavar="PATH", help="answer requests from an archive written by --record instead of the network")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="with --replay, divide the recorded response times by this, 0 answers at once (default: %(default)s)")
+
+
+class ItemDataAction(argparse.Action):
+    # every --item-data adds to the data so far, which start out as the [item-data] table of the config file
+    def __call__(self, parser, namespace, values, option_string=None):
+        label, separator, column = values.partition("=")
+        if not separator or not label.strip() or not column.strip():
+            raise argparse.ArgumentError(self, f"{values!r} is not LABEL=COLUMN")
+        setattr(namespace, self.dest, {**(getattr(namespace, self.dest) or {}), label.strip(): column.strip()})
+
+
+def add_item_data_arguments(parser):
+    parser.add_argument("--item-data", action=ItemDataAction, default={}, metavar="LABEL=COLUMN",
+                        help=f"also attach this csv column to every item as a datum, or change the column of a default one "
+                             f"({', '.join(f'{label}={column}' for label, column in DEFAULT_ITEM_DATA.items())}); can be repeated")
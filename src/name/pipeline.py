@@ -0,0 +1,117 @@
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from name.metrics import METRICS
+
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+class SkipCard(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    index: int
+    card: dict
+    results: dict = field(default_factory=dict)
+    messages: list = field(default_factory=list)
+    failed: bool = False
+    target: Any = None
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Job], Any]
+    workers: int = 1
+
+
+def print_report(job):
+    for message in job.messages:
+        print(message)
+
+
+def _run_stage(stage, inbox, outbox, finished):
+    while True:
+        job = inbox.get()
+        if job is _DONE:
+            finished()
+            return
+        if not job.failed:
+            try:
+                with METRICS.phase(stage.name):
+                    job.results[stage.name] = stage.run(job)
+            except SkipCard as e:
+                if str(e):
+                    job.log(str(e))
+                job.failed = True
+            except Exception as e:
+                job.log(f"[ERROR] {stage.name} failed for {job.card}: {e}")
+                job.failed = True
+        outbox.put(job)
+
+
+def run_pipeline(cards, stages, queue_size=DEFAULT_QUEUE_SIZE, report=print_report):
+    # bounded queues between stages keep at most queue_size cards buffered ahead of a slow stage
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages] + [queue.Queue()]
+
+    feed_error = []
+
+    def feed():
+        try:
+            for index, card in enumerate(cards):
+                # callers hand in prepared Jobs when each card needs a target attached
+                job = card if isinstance(card, Job) else Job(index, card)
+                job.index = index
+                queues[0].put(job)
+        except Exception as e:
+            # e.g. a csv that turns out broken halfway, raised in the caller once the cards read so far are through
+            feed_error.append(e)
+        finally:
+            for _ in range(stages[0].workers):
+                queues[0].put(_DONE)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for position, stage in enumerate(stages):
+        remaining = [stage.workers]
+        lock = threading.Lock()
+
+        def finished(position=position, remaining=remaining, lock=lock):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                following = stages[position + 1].workers if position + 1 < len(stages) else 1
+                for _ in range(following):
+                    queues[position + 1].put(_DONE)
+
+        for _ in range(stage.workers):
+            threads.append(threading.Thread(
+                target=_run_stage, args=(stage, queues[position], queues[position + 1], finished), daemon=True,
+            ))
+    for thread in threads:
+        thread.start()
+
+    # cards finish out of order, report them in input order so the log reads the same on every run
+    jobs = []
+    pending = {}
+    while True:
+        job = queues[-1].get()
+        if job is _DONE:
+            break
+        pending[job.index] = job
+        while len(jobs) in pending:
+            ready = pending.pop(len(jobs))
+            report(ready)
+            jobs.append(ready)
+    if feed_error:
+        raise feed_error[0]
+    return jobs
@@ -0,0 +1,300 @@
+import csv
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import requests
+
+from name.koillection import VISIBILITY, print_response_body
+from name.journal import Journal
+from name.metrics import METRICS
+from name.options import DEFAULT_ITEM_DATA
+from name.pipeline import Job, SkipCard, Stage, print_report, run_pipeline
+from name.sync import apply_changes, attach_data, comparable_fields, fetch_all, plan_sync
+from name.transform import transform_stage
+
+CURRENCY = "EUR"
+DOWNLOAD_WORKERS = 4
+POST_WORKERS = 2
+# (label, csv column) of every datum attached to an item, all sent at once after the item exists
+ITEM_DATA = tuple(DEFAULT_ITEM_DATA.items())
+# the attach pool only starts threads as they are needed, this just has to cover a card's data and image at once
+ATTACH_WORKERS = 32
+
+
+def item_data(config=None):
+    # ITEM_DATA plus what --item-data or an [item-data] table adds; a label given again takes the new column
+    data = dict(ITEM_DATA)
+    for label, column in (config or {}).items():
+        if not isinstance(column, str) or not column.strip():
+            raise ValueError(f"item datum {label!r} needs the name of a csv column")
+        data[label] = column.strip()
+    return tuple(data.items())
+
+
+def target_iri(value, resource):
+    # accepts a link copied from the koillection web ui or the bare uuid
+    match = re.search(rf"/{resource}/([a-f0-9\-]{{36}})", value) or re.fullmatch(r"([a-f0-9\-]{36})", value)
+    if not match:
+        raise ValueError(f"{value!r} is neither a {resource} url nor an id")
+    return f"/api/{resource}/{match.group(1)}"
+
+
+def pokemon_wish(card, wishlist):
+    return {
+        "name": card["Name"],
+        "url": card["URL"],
+        "comment": card["URL"],
+        "wishlist": wishlist,
+        "price": card["Price"],
+        "currency": CURRENCY,
+        "visibility": VISIBILITY
+    }
+
+
+def murakami_wish(card, wishlist):
+    return {
+        "name": card["name"],
+        "url": f"https://www.ebay.com/sch/i.html?_nkw=Murakami%20{card['name']}%20{card['id']}&_sacat=1&_odkw=Takeshi%20Murakami%20SP-222&_osacat=1",
+        "comment": f"{card['id']} ({card['rarity']}) - {card['description']}",
+        "wishlist": wishlist,
+        "visibility": VISIBILITY
+    }
+
+
+def item_payload(card, collection):
+    return {
+        "name": card["name"],
+        "collection": collection,
+        "visibility": VISIBILITY
+    }
+
+
+@dataclass(frozen=True)
+class CardFormat:
+    # column names of one scraper's csv and how its rows turn into wishes
+    kind: str  # key in FORMATS
+    name: str
+    key: str  # identifies a card in the journal
+    required: tuple  # columns that must not be empty
+    image: str  # column with the image url
+    price: str | None  # column with a decimal price
+    columns: tuple  # every column the wish payload reads
+    wish: Callable[[dict, str], dict]
+    posted: tuple  # columns copied into the posted cards csv
+
+
+FORMATS = {
+    "pokemon": CardFormat(
+        kind="pokemon", name="Name", key="URL", required=("Name", "URL", "Price", "Image URL"),
+        image="Image URL", price="Price", columns=("Name", "URL", "Price", "Image URL"),
+        wish=pokemon_wish, posted=("Name", "URL", "Price"),
+    ),
+    "murakami": CardFormat(
+        kind="murakami", name="name", key="id", required=("id", "name", "image_url"),
+        image="image_url", price=None, columns=("id", "name", "image_url", "rarity", "description"),
+        wish=murakami_wish, posted=("id", "name"),
+    ),
+}
+
+
+def load_cards_from_csv(csv_file):
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def save_posted_cards(jobs, card_format, output_file):
+    rows = [{
+        **{column: job.card[column] for column in card_format.posted},
+        "ID": job.results["create"],
+        "Image File": job.results["download"] or "",
+    } for job in jobs if not job.failed]
+    if not rows:
+        print("[WARN] No cards were successfully posted.")
+        return
+    with METRICS.phase("csv"), open(output_file, mode="w", newline='', encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[*card_format.posted, "ID", "Image File"])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"[INFO] Saved {len(rows)} posted card(s) to {output_file}")
+
+
+def download_image(url, name, images, log=print):
+    if not url:
+        log(f"[WARN] No image URL for {name}")
+        return None
+
+    try:
+        filepath, cached = images.fetch(url)
+        if cached:
+            log(f"[INFO] Using cached image for {name} -> {filepath}")
+        else:
+            log(f"[INFO] Downloaded image for {name} -> {filepath}")
+        return filepath
+    except requests.RequestException as e:
+        log(f"[ERROR] Failed to download image for {name}: {e}")
+        return None
+
+
+def post_card(create, payload, name, log=print):
+    try:
+        card_id = create(payload)
+        log(f"[SUCCESS] {name} added with ID: {card_id}")
+        return card_id
+    except requests.RequestException as e:
+        log(f"[ERROR] Failed to add {name}: {e}")
+        print_response_body(e, log)
+        return None
+
+
+def upload_image(client, resource, object_id, image_path, name, log=print):
+    if not image_path or not os.path.isfile(image_path):
+        log(f"[WARN] No image to upload for {name}")
+        return False
+
+    try:
+        client.upload_image(resource, object_id, image_path)
+        log(f"[UPLOAD] Image uploaded for {name}")
+        return True
+    except requests.RequestException as e:
+        log(f"[ERROR] Upload failed for {name}: {e}")
+        print_response_body(e, log)
+        return False
+
+
+def post_datum(card, client, item_id, label, column, log=print):
+    try:
+        datum_id = client.create_datum(item_id, label, card[column])
+        log(f"[SUCCESS] {label} {card[column]} added to ID: {datum_id}")
+        return datum_id
+    except requests.RequestException as e:
+        log(f"[ERROR] Failed to add {label} to {card['name']}: {e}")
+        print_response_body(e, log)
+        return None
+
+
+def plan_wishes(client, cards, wishlist, card_format):
+    remote = fetch_all(client, f"{wishlist}/wishes")
+    plan = plan_sync(cards, remote, lambda card: card_format.wish(card, wishlist)["url"], lambda wish: wish.get("url"),
+                     compare=lambda card: comparable_fields(card_format.wish(card, wishlist)))
+    print(f"[SYNC] {len(remote)} wishes online, {len(plan.create)} to create, {len(plan.update)} changed, {len(plan.delete)} not in csv")
+    return plan
+
+
+def plan_items(client, cards, collection):
+    remote = attach_data(client, fetch_all(client, f"{collection}/items"))
+    plan = plan_sync(cards, remote, lambda card: card["id"], lambda item: item["data"].get("Set Number"),
+                     compare=lambda card: comparable_fields(item_payload(card, collection)))
+    print(f"[SYNC] {len(remote)} items online, {len(plan.create)} to create, {len(plan.update)} changed, {len(plan.delete)} not in csv")
+    return plan
+
+
+@dataclass
+class Target:
+    # where the cards of one csv go, carried by each pipeline job so one run can feed several targets
+    resource: str  # "wishes" or "items"
+    iri: str
+    card_format: CardFormat
+    journal: Journal
+    name: str = ""
+    catalog: Any = None  # records the remote id of every created wish/item when set
+    item_data: tuple = ITEM_DATA  # (label, csv column) pairs attached to every item
+
+    def payload(self, card):
+        if self.resource == "wishes":
+            return self.card_format.wish(card, self.iri)
+        return item_payload(card, self.iri)
+
+
+def sync_target(client, target, cards, update=False, delete=False):
+    if target.resource == "wishes":
+        plan = plan_wishes(client, cards, target.iri, target.card_format)
+    else:
+        plan = plan_items(client, cards, target.iri)
+    apply_changes(client, target.resource, plan, update=update, delete=delete)
+    return plan.create
+
+
+def post_jobs(client, jobs, images, transformer=None, report=print_report):
+    # Step 1: Download image
+    def download(job):
+        card, target = job.card, job.target
+        card_format = target.card_format
+        if any(not card.get(column) for column in card_format.required):
+            raise SkipCard(f"[SKIP] Incomplete data for row: {card}")
+        if target.journal.done(card[card_format.key], "upload"):
+            job.log(f"[RESUME] {card[card_format.name]} was already posted")
+            return None
+        image_path = download_image(card.get(card_format.image, ""), card[card_format.name], images, job.log)
+        card["DownloadedImage"] = image_path or ""
+        return image_path
+
+    # Step 2: Create wish/item
+    def create(job):
+        target = job.target
+        key = job.card[target.card_format.key]
+        object_id = target.journal.get(key, "create")
+        if not object_id:
+            create_object = client.create_wish if target.resource == "wishes" else client.create_item
+            object_id = post_card(create_object, target.payload(job.card), job.card[target.card_format.name], job.log)
+            if not object_id:
+                raise SkipCard()
+            target.journal.record(key, "create", object_id)
+            if target.catalog:
+                target.catalog.record_posting(job.card, target.card_format.kind, target.resource, target.iri, object_id)
+        return object_id
+
+    # Step 3: Create fields and upload image, they only depend on the wish/item so they go out together
+    attach_pool = ThreadPoolExecutor(max_workers=POST_WORKERS * ATTACH_WORKERS)
+
+    def send_datum(job, label, column, log):
+        journal, key = job.target.journal, job.card[job.target.card_format.key]
+        if not journal.done(key, f"data:{label}"):
+            with METRICS.phase("data"):
+                posted = post_datum(job.card, client, job.results["create"], label, column, log)
+            if posted:
+                journal.record(key, f"data:{label}")
+
+    def send_image(job, log):
+        target = job.target
+        key = job.card[target.card_format.key]
+        if not target.journal.done(key, "upload"):
+            with METRICS.phase("upload"):
+                uploaded = upload_image(client, target.resource, job.results["create"], job.results.get("transform") or job.results["download"],
+                                        job.card[target.card_format.name], log)
+            if uploaded:
+                target.journal.record(key, "upload")
+
+    def attach(job):
+        if job.target.resource == "wishes":
+            send_image(job, job.log)
+            return
+        tasks = []
+        for label, column in job.target.item_data:
+            messages = []
+            tasks.append((attach_pool.submit(send_datum, job, label, column, messages.append), messages))
+        messages = []
+        tasks.append((attach_pool.submit(send_image, job, messages.append), messages))
+        # each task logs into its own list so the card's log keeps the item_data order
+        for future, messages in tasks:
+            future.result()
+            for message in messages:
+                job.log(message)
+
+    try:
+        return run_pipeline(jobs, [
+            Stage("download", download, workers=DOWNLOAD_WORKERS),
+            *([transform_stage(transformer)] if transformer else []),
+            Stage("create", create, workers=POST_WORKERS),
+            Stage("attach", attach, workers=POST_WORKERS),
+        ], report=report)
+    finally:
+        attach_pool.shutdown()
+
+
+def post_cards(client, target, cards, images, transformer=None, sync=False, update=False, delete=False):
+    if sync:
+        cards = sync_target(client, target, cards, update=update, delete=delete)
+    return post_jobs(client, (Job(index, card, target=target) for index, card in enumerate(cards)), images, transformer)
@@ -0,0 +1,233 @@
+import argparse
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+THROTTLE_STATUSES = (429, 503)
+# requests per second shared by every process talking to one koillection host, about what one posting run reaches alone
+DEFAULT_HOST_RATE = 30.0
+DEFAULT_RATE_DIR = ".cache/rate"
+
+DEFAULT_LIMIT = {
+    "rate": 2.0,  # requests per second to start with
+    "min_rate": 0.2,
+    "max_rate": 20.0,
+    "burst": 2,
+    "target_latency": 0.5,  # seconds, faster responses let the rate grow
+}
+# image uploads are the heaviest requests, so they start and top out lower
+DEFAULT_ENDPOINT_LIMITS = {
+    "wishes": {},
+    "items": {},
+    "data": {"max_rate": 40.0},
+    "image": {"rate": 1.0, "max_rate": 10.0},
+}
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def endpoint_key(path):
+    parts = [part for part in path.split("?")[0].split("/") if part]
+    if parts and parts[-1] == "image":
+        return "image"
+    if len(parts) >= 2 and parts[0] == "api":
+        return parts[1]
+    return "default"
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=DEFAULT_LIMIT["rate"], min_rate=DEFAULT_LIMIT["min_rate"], max_rate=DEFAULT_LIMIT["max_rate"],
+                 burst=DEFAULT_LIMIT["burst"], target_latency=DEFAULT_LIMIT["target_latency"]):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # take the token now and sleep off the debt outside the lock, so waiters queue up fairly
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, self.paused_until - now, 0.0)
+        if wait:
+            time.sleep(wait)
+
+    def feedback(self, status_code, latency, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status_code in THROTTLE_STATUSES:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+                pause = parse_retry_after(retry_after)
+                if pause is not None:
+                    self.paused_until = max(self.paused_until, now + pause)
+            elif status_code < 400:
+                if latency <= self.target_latency:
+                    self.rate = min(self.max_rate, self.rate + 0.5)
+                elif latency > 4 * self.target_latency:
+                    self.rate = max(self.min_rate, self.rate * 0.8)
+
+
+class EndpointLimits:
+    def __init__(self, config=None):
+        self._limiters = {}
+        # settings given for an endpoint override its defaults one by one
+        self._config = {key: {**DEFAULT_ENDPOINT_LIMITS.get(key, {}), **(config or {}).get(key, {})}
+                        for key in {*DEFAULT_ENDPOINT_LIMITS, *(config or {})}}
+        self._lock = threading.Lock()
+
+    def for_path(self, path):
+        key = endpoint_key(path)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = AdaptiveRateLimiter(**{**DEFAULT_LIMIT, **self._config.get(key, {})})
+            return limiter
+
+
+class SharedRateBudget:
+    # token bucket of one host kept in a file, every process posting to that host draws from it under an flock,
+    # so two scripts running side by side stay within the same limit one of them would get alone
+    def __init__(self, host, rate=DEFAULT_HOST_RATE, burst=None, directory=DEFAULT_RATE_DIR):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self.path = Path(directory) / (re.sub(r"[^\w.-]", "_", host) + ".json")
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        # flock is per open file, so threads of this process queue on a lock of their own first
+        self._lock = threading.Lock()
+
+    def close(self):
+        os.close(self._fd)
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                try:
+                    state = json.loads(os.read(self._fd, 4096) or b"{}")
+                except json.JSONDecodeError:
+                    state = {}
+                now = time.time()
+                # wall clock, the only clock every process agrees on
+                elapsed = max(0.0, now - state.get("updated", now))
+                state["tokens"] = min(self.burst, state.get("tokens", self.burst) + elapsed * self.rate)
+                state["updated"] = now
+                state.setdefault("paused_until", 0.0)
+                yield state, now
+                data = json.dumps(state).encode()
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, data)
+                os.ftruncate(self._fd, len(data))
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self):
+        with self._state() as (state, now):
+            state["tokens"] -= 1
+            wait = max(-state["tokens"] / self.rate, state["paused_until"] - now, 0.0)
+        if wait:
+            time.sleep(wait)
+
+    def feedback(self, status_code, retry_after=None):
+        # a throttle seen by any process pauses all of them
+        if status_code not in THROTTLE_STATUSES:
+            return
+        pause = parse_retry_after(retry_after)
+        with self._state() as (state, now):
+            state["tokens"] = min(state["tokens"], 0.0)
+            if pause is not None:
+                state["paused_until"] = max(state["paused_until"], now + pause)
+
+
+def check_limits(config):
+    # {endpoint: {setting: number}} as given in a --config [limits.<endpoint>] table or by --limit
+    checked = {}
+    for endpoint, settings in config.items():
+        if not isinstance(settings, dict):
+            raise ValueError(f"limits of {endpoint} must be a table of settings")
+        checked[endpoint] = {}
+        for name, value in settings.items():
+            name = name.replace("-", "_")
+            if name not in DEFAULT_LIMIT:
+                raise ValueError(f"unknown limit {name!r} for {endpoint}, expected one of {', '.join(DEFAULT_LIMIT)}")
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"limit {name} of {endpoint} must be a number, not {value!r}") from None
+            if value <= 0:
+                raise ValueError(f"limit {name} of {endpoint} must be positive")
+            checked[endpoint][name] = value
+    return checked
+
+
+def parse_limit(value):
+    # "image=rate:1,max_rate:10" -> {"image": {"rate": 1.0, "max_rate": 10.0}}
+    endpoint, _, settings = value.partition("=")
+    pairs = [setting.partition(":") for setting in settings.split(",") if setting.strip()]
+    if not endpoint.strip() or not pairs or any(not separator for _, separator, _ in pairs):
+        raise ValueError(f"{value!r} is not ENDPOINT=SETTING:VALUE[,SETTING:VALUE...]")
+    return check_limits({endpoint.strip(): {name.strip(): number.strip() for name, _, number in pairs}})
+
+
+class LimitAction(argparse.Action):
+    # every --limit adds to the limits so far, which start out as the [limits] of the config file
+    def __call__(self, parser, namespace, values, option_string=None):
+        try:
+            limits = check_limits(getattr(namespace, self.dest) or {})
+            limit = parse_limit(values)
+        except ValueError as e:
+            raise argparse.ArgumentError(self, str(e))
+        for endpoint, settings in limit.items():
+            limits.setdefault(endpoint, {}).update(settings)
+        setattr(namespace, self.dest, limits)
+
+
+def add_rate_arguments(parser):
+    parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE,
+                        help="requests per second to the koillection host, shared by every process on this machine, 0 for no shared limit (default: %(default)s)")
+    parser.add_argument("--rate-dir", default=DEFAULT_RATE_DIR, help="where the shared per-host budgets are kept (default: %(default)s)")
+    parser.add_argument("--limit", dest="limits", action=LimitAction, default={}, metavar="ENDPOINT=SETTING:VALUE,...",
+                        help=f"adaptive rate limit of one endpoint ({', '.join(DEFAULT_ENDPOINT_LIMITS)} or default), "
+                             f"settings are {', '.join(DEFAULT_LIMIT)}, e.g. image=rate:1,max_rate:10; can be repeated")
+
+
+def limits_from_args(args):
+    return EndpointLimits(check_limits(args.limits or {}))
+
+
+def budget_from_args(args, domain):
+    if not args.host_rate:
+        return None
+    return SharedRateBudget(urlparse(domain).netloc, args.host_rate, directory=args.rate_dir)
@@ -0,0 +1,178 @@
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from name.options import add_tape_arguments  # noqa: F401
+from name.retry import RetryAdapter, was_not_sent
+
+FORMAT = "koillection-tools-tape"
+VERSION = 1
+# the recorded body is stored decoded, so these no longer describe it
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding"}
+
+
+class ReplayMiss(requests.ConnectionError):
+    pass
+
+
+def body_digest(body):
+    if body is None:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+class Recorder:
+    # appends one gzipped json line per attempt, including failed ones, so retries replay too;
+    # the archive only appears under its name once the run is over
+    def __init__(self, path):
+        self.path = str(path)
+        self._tmp = f"{self.path}.tmp"
+        self._file = gzip.open(self._tmp, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._write({"format": FORMAT, "version": VERSION, "started": time.time()})
+
+    def _write(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def send(self, request, send):
+        started = time.monotonic()
+        entry = {"method": request.method, "url": request.url, "body": body_digest(request.body)}
+        try:
+            response = send()
+            # streamed bodies are read in full here, a recording has to hold what the caller might read
+            content = response.content
+        except requests.RequestException as e:
+            self._write({**entry, "error": type(e).__name__, "message": str(e), "not_sent": was_not_sent(e),
+                         "elapsed": time.monotonic() - started})
+            raise
+        self._write({
+            **entry,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "content": base64.b64encode(content).decode("ascii"),
+            "elapsed": time.monotonic() - started,
+        })
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            os.replace(self._tmp, self.path)
+
+
+def replayed_error(entry, request):
+    # the same exception type as recorded, and a refused connection keeps its NewConnectionError reason,
+    # so the retry policy decides about a replayed create exactly as it did in the recorded run
+    message = f"{entry['error']} (replayed): {entry['message']}"
+    error = getattr(requests.exceptions, entry["error"], None)
+    if not (isinstance(error, type) and issubclass(error, requests.RequestException)):
+        error = requests.ConnectionError
+    if entry.get("not_sent") and not issubclass(error, requests.Timeout):
+        return error(MaxRetryError(None, request.url, NewConnectionError(None, message)), request=request)
+    return error(message, request=request)
+
+
+class Replayer:
+    # serves recorded attempts back in the order they were recorded; a request with the same method, url and body
+    # takes the next unused answer, otherwise (multipart boundaries differ per run) the next one for its method and url.
+    # once those run out the last answer repeats, e.g. for a token refresh the recorded run didn't need
+    def __init__(self, path, speed=1.0):
+        self.speed = speed
+        self._exact = {}
+        self._loose = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != FORMAT:
+                raise ValueError(f"{path} is not a recording")
+            for line in f:
+                entry = json.loads(line)
+                entry["used"] = False
+                self._exact.setdefault((entry["method"], entry["url"], entry["body"]), deque()).append(entry)
+                self._loose.setdefault((entry["method"], entry["url"]), deque()).append(entry)
+                self._last[(entry["method"], entry["url"])] = entry
+
+    def _take(self, request):
+        loose = (request.method, request.url)
+        with self._lock:
+            for entries in (self._exact.get((*loose, body_digest(request.body))), self._loose.get(loose)):
+                while entries:
+                    entry = entries.popleft()
+                    if not entry["used"]:
+                        entry["used"] = True
+                        return entry
+            entry = self._last.get(loose)
+        if entry is None:
+            raise ReplayMiss(f"no recorded response for {request.method} {request.url}")
+        return entry
+
+    def send(self, request, send=None):
+        entry = self._take(request)
+        if self.speed:
+            time.sleep(entry["elapsed"] / self.speed)
+        if "error" in entry:
+            raise replayed_error(entry, request)
+        content = base64.b64decode(entry["content"])
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict({key: value for key, value in entry["headers"].items() if key.lower() not in DROPPED_HEADERS})
+        response.headers["Content-Length"] = str(len(content))
+        response._content, response._content_consumed = content, True
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=entry["elapsed"])
+        return response
+
+    def close(self):
+        pass
+
+
+# the recorder or replayer of this process, every session from name.fetch goes through it when set
+TAPE = None
+
+
+def use_tape(tape):
+    global TAPE
+    TAPE = tape
+    return tape
+
+
+class TapeAdapter(RetryAdapter):
+    # sits under the retry policy, so each attempt is recorded and replayed on its own
+    def send_once(self, request, *args, **kwargs):
+        if TAPE is None:
+            return super().send_once(request, *args, **kwargs)
+        return TAPE.send(request, lambda: super(TapeAdapter, self).send_once(request, *args, **kwargs))
+
+
+def tape_from_args(args):
+    if args.record and args.replay:
+        raise SystemExit("--record and --replay can't be used together")
+    if args.record:
+        tape = Recorder(args.record)
+        atexit.register(tape.close)
+        return use_tape(tape)
+    if args.replay:
+        return use_tape(Replayer(args.replay, args.replay_speed))
+    return None
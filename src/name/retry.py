@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from name.metrics import METRICS
+from name.options import DEFAULT_BREAKER, DEFAULT_RETRY, add_retry_arguments  # noqa: F401
+from name.ratelimit import endpoint_key, parse_retry_after
+
+# PATCH is only idempotent for merge patches, which is all the koillection client sends
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+# 429 and 503 are throttles, left to the koillection client whose rate limiters have to see them
+RETRY_STATUSES = (500, 502, 504)
+# a 503 without Retry-After still says the host is in trouble
+FAILURE_STATUSES = (500, 502, 503, 504)
+
+
+class CircuitOpen(requests.ConnectionError):
+    pass
+
+
+def is_idempotent(request):
+    # the image endpoint replaces the picture of a wish/item, so sending it twice leaves the same state
+    return request.method in IDEMPOTENT_METHODS or endpoint_key(urlparse(request.url).path) == "image"
+
+
+def was_not_sent(error):
+    # the connection was never made, so the server cannot have acted on the request
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectTimeout) or isinstance(reason, NewConnectionError)
+
+
+def backoff(attempt, base_delay, max_delay, rand=random.random):
+    # full jitter: anywhere between zero and the capped exponential step, so workers that failed together spread out
+    return rand() * min(max_delay, base_delay * 2 ** attempt)
+
+
+class CircuitBreaker:
+    # after `threshold` failures in a row the host counts as down and callers wait instead of sending;
+    # once the cooldown is over a single probe goes through, success closes the breaker, failure doubles the cooldown
+    def __init__(self, threshold=DEFAULT_BREAKER["threshold"], cooldown=DEFAULT_BREAKER["cooldown"],
+                 max_cooldown=DEFAULT_BREAKER["max_cooldown"], max_down=DEFAULT_BREAKER["max_down"]):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_down = max_down
+        self.failures = 0
+        self.down_since = None
+        self.retry_at = 0.0
+        self.current_cooldown = cooldown
+        self.probing = False
+        self._changed = threading.Condition()
+
+    @property
+    def open(self):
+        return self.down_since is not None
+
+    def before(self):
+        # blocks while the host is down, returns True when the caller is the probe
+        with self._changed:
+            while self.down_since is not None:
+                now = time.monotonic()
+                # probes keep going out however long the outage lasts, so the run picks up again once the host is back
+                if not self.probing and now >= self.retry_at:
+                    self.probing = True
+                    return True
+                if now - self.down_since > self.max_down:
+                    raise CircuitOpen(f"host has been failing for {now - self.down_since:.0f}s")
+                self._changed.wait(1.0 if self.probing else self.retry_at - now)
+            return False
+
+    def success(self, probe=False):
+        with self._changed:
+            self.failures = 0
+            self.down_since = None
+            self.current_cooldown = self.cooldown
+            if probe:
+                self.probing = False
+            self._changed.notify_all()
+
+    def release(self, probe):
+        # the attempt failed for a reason that says nothing about the host
+        if probe:
+            with self._changed:
+                self.probing = False
+                self._changed.notify_all()
+
+    def failure(self, probe=False):
+        with self._changed:
+            now = time.monotonic()
+            self.failures += 1
+            if probe:
+                self.probing = False
+                self.current_cooldown = min(self.max_cooldown, self.current_cooldown * 2)
+                self.retry_at = now + self.current_cooldown
+                self._changed.notify_all()
+            elif self.down_since is None and self.failures >= self.threshold:
+                self.down_since = now
+                self.retry_at = now + self.current_cooldown
+
+
+class RetryPolicy:
+    def __init__(self, attempts=DEFAULT_RETRY["attempts"], base_delay=DEFAULT_RETRY["base_delay"], max_delay=DEFAULT_RETRY["max_delay"],
+                 breaker=None, sleep=time.sleep, rand=random.random):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_config = {**DEFAULT_BREAKER, **(breaker or {})}
+        self.sleep = sleep
+        self.rand = rand
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(**self.breaker_config)
+            return breaker
+
+    def send(self, request, send):
+        # send() performs one attempt; idempotent requests are retried on connection errors and 5xx,
+        # anything else only when it never left this machine
+        path = urlparse(request.url).path
+        idempotent = is_idempotent(request)
+        breaker = self.breaker(urlparse(request.url).netloc)
+        attempt = 0
+        while True:
+            probe = breaker.before()
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.failure(probe)
+                if attempt + 1 >= self.attempts or not (idempotent or was_not_sent(e)):
+                    raise
+                reason, retry_after = "connection", None
+            except Exception:
+                breaker.release(probe)
+                raise
+            else:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                # a 503 with Retry-After is the server asking for a pause, it is up and answering
+                if response.status_code not in FAILURE_STATUSES or (response.status_code == 503 and retry_after is not None):
+                    breaker.success(probe)
+                else:
+                    breaker.failure(probe)
+                if response.status_code not in RETRY_STATUSES or not idempotent or attempt + 1 >= self.attempts:
+                    return response
+                reason = str(response.status_code)
+                response.close()
+            METRICS.count_retry(path, reason)
+            self.sleep(max(backoff(attempt, self.base_delay, self.max_delay, self.rand), retry_after or 0.0))
+            attempt += 1
+
+
+class RetryAdapter(HTTPAdapter):
+    def __init__(self, policy=None, **kwargs):
+        self.policy = policy
+        super().__init__(**kwargs)
+
+    def send(self, request, *args, **kwargs):
+        return (self.policy or RETRY).send(request, lambda: self.send_once(request, *args, **kwargs))
+
+    def send_once(self, request, *args, **kwargs):
+        return super().send(request, *args, **kwargs)
+
+
+# shared by every session so all workers see the same breaker per host
+RETRY = RetryPolicy()
+
+
+def retry_from_args(args, policy=RETRY):
+    policy.attempts = max(1, args.retries)
+    policy.breaker_config["threshold"] = args.breaker_threshold
@@ -0,0 +1,53 @@
+from lxml import etree
+
+from name.fetch import thread_session
+from name.metrics import METRICS
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+def _first(result):
+    if isinstance(result, list):
+        if not result:
+            return None
+        result = result[0]
+    if isinstance(result, etree._Element):
+        result = result.text_content() if hasattr(result, "text_content") else "".join(result.itertext())
+    return str(result).strip()
+
+
+def extract_streaming(url, xpaths, session=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    # feeds the body into an incremental parser and hangs up as soon as every xpath has a match,
+    # so harvesting one field from a long page only downloads the head of it.
+    # a match is taken as final once it appears, which holds for "first element" style expressions
+    # like (//img)[1]/@src but not for ones that depend on the end of the document
+    compiled = {field: etree.XPath(xpath) if isinstance(xpath, str) else xpath for field, xpath in xpaths.items()}
+    found = {}
+
+    def collect(root):
+        with METRICS.phase("parse"):
+            for field, xpath in compiled.items():
+                if field not in found:
+                    value = _first(xpath(root))
+                    if value:
+                        found[field] = value
+        return len(found) == len(compiled)
+
+    parser = etree.HTMLPullParser(events=("start",))
+    root = None
+    received = 0
+    with (session or thread_session()).get(url, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size):
+            received += len(chunk)
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if root is None:
+                    root = element.getroottree().getroot()
+            if root is not None and collect(root):
+                break
+        else:
+            # the whole page arrived, the parser may still hold its tail
+            collect(parser.close())
+        # leaving the with block closes the response, which drops the connection if the body wasn't read to the end
+    return {field: found.get(field, "") for field in compiled}, received
@@ -0,0 +1,94 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+
+from name.koillection import print_response_body
+
+DEFAULT_WORKERS = 4
+# payload fields that place a wish/item rather than describe it, never worth a PATCH
+PLACEMENT_FIELDS = ("wishlist", "collection", "visibility")
+
+
+@dataclass
+class SyncPlan:
+    create: list = field(default_factory=list)
+    update: list = field(default_factory=list)  # (remote id, card, changed fields)
+    delete: list = field(default_factory=list)  # remote ids
+
+
+def fetch_all(client, path, workers=DEFAULT_WORKERS):
+    first = client.get(path, {"page": 1})
+    members = first.get("hydra:member", [])
+    total = first.get("hydra:totalItems", len(members))
+    if not members or total <= len(members):
+        return members
+    # the page size is whatever the server returned for page one, the rest can be fetched side by side
+    pages = math.ceil(total / len(members))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for page in pool.map(lambda n: client.get(path, {"page": n}), range(2, pages + 1)):
+            members.extend(page.get("hydra:member", []))
+    return members
+
+
+def attach_data(client, items, workers=DEFAULT_WORKERS):
+    # item data (e.g. "Set Number") live in their own resource, fetch them per item in parallel
+    def load(item):
+        item["data"] = {datum["label"]: datum.get("value") for datum in fetch_all(client, f"/api/items/{item['id']}/data", workers=1)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(load, items))
+    return items
+
+
+def comparable_fields(payload):
+    return {name: value for name, value in payload.items() if name not in PLACEMENT_FIELDS}
+
+
+def plan_sync(cards, remote, card_key, remote_key, compare=None):
+    remote_by_key = {}
+    for record in remote:
+        remote_by_key.setdefault(remote_key(record), record)
+
+    plan = SyncPlan()
+    seen = set()
+    for card in cards:
+        key = card_key(card)
+        seen.add(key)
+        record = remote_by_key.get(key)
+        if record is None:
+            plan.create.append(card)
+        elif compare:
+            changes = {name: value for name, value in compare(card).items() if record.get(name) != value}
+            if changes:
+                plan.update.append((record["id"], card, changes))
+    plan.delete = [record["id"] for key, record in remote_by_key.items() if key not in seen]
+    return plan
+
+
+def apply_changes(client, resource, plan, workers=DEFAULT_WORKERS, update=True, delete=False):
+    def patch(change):
+        remote_id, card, fields = change
+        try:
+            client.update(resource, remote_id, fields)
+            return f"[UPDATE] {remote_id}: {', '.join(fields)}"
+        except requests.RequestException as e:
+            print_response_body(e)
+            return f"[ERROR] Failed to update {remote_id}: {e}"
+
+    def remove(remote_id):
+        try:
+            client.delete(resource, remote_id)
+            return f"[DELETE] {remote_id}"
+        except requests.RequestException as e:
+            print_response_body(e)
+            return f"[ERROR] Failed to delete {remote_id}: {e}"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if update:
+            for message in pool.map(patch, plan.update):
+                print(message)
+        if delete:
+            for message in pool.map(remove, plan.delete):
+                print(message)
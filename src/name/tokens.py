@@ -0,0 +1,62 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_TOKEN_CACHE = ".cache/tokens.json"
+
+
+class TokenCache:
+    # auth tokens of every (user, domain) pair, shared by all runs on this machine.
+    # readers go lock free since the file is swapped in atomically; refreshing takes an exclusive flock
+    # and looks again first, so processes that find the same expired token log in once between them
+    def __init__(self, path=DEFAULT_TOKEN_CACHE):
+        self.path = Path(path)
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, entries):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        # created 0600 so the token is never readable by others, not even for a moment
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            os.fchmod(f.fileno(), 0o600)
+            json.dump(entries, f)
+        os.replace(tmp, self.path)
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(self.path.with_name(self.path.name + ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def token(self, key, usable, login):
+        # returns the cached {"token", "expires_at"} of key if usable(entry), otherwise logs in and caches the result;
+        # login() returns (token, expires_at) with expires_at None when the token doesn't say
+        entry = self._read().get(key)
+        if entry and usable(entry):
+            return entry
+        with self._locked():
+            entry = self._read().get(key)
+            if entry and usable(entry):
+                return entry
+            token, expires_at = login()
+            entries = self._read()
+            entries[key] = {"token": token, "expires_at": expires_at}
+            self._write(entries)
+            return entries[key]
+
+
+def add_token_cache_arguments(parser):
+    parser.add_argument("--token-cache", default=DEFAULT_TOKEN_CACHE, help="file the auth token is kept in between runs (default: %(default)s)")
+    parser.add_argument("--no-token-cache", dest="token_cache", action="store_const", const=None, help="log in afresh on every run")
@@ -0,0 +1,90 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from name.pipeline import Stage
+
+DEFAULT_TRANSFORM_DIR = ".cache/transformed"
+DEFAULT_WORKERS = os.cpu_count() or 2
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+@dataclass(frozen=True)
+class ImageTransform:
+    max_dimension: int = 1200
+    format: str = "WEBP"
+    quality: int = 85
+
+    def key(self):
+        return f"{self.max_dimension}-{self.format.lower()}-q{self.quality}"
+
+
+def transform_image(source_path, output_path, transform):
+    # runs in a worker process, pillow is only needed when the transform stage is enabled
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as original:
+        # bake the exif orientation in before the metadata is dropped
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((transform.max_dimension, transform.max_dimension))
+        if transform.format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        # a temp name of its own, posting runs side by side may transform the same image at once
+        tmp = f"{output_path}.{os.getpid()}.tmp"
+        # nothing from image.info is passed on, so exif/xmp/comments are not written to the output
+        image.save(tmp, format=transform.format, quality=transform.quality, optimize=True)
+    os.replace(tmp, output_path)
+    return output_path
+
+
+class ImageTransformer:
+    def __init__(self, transform, directory=DEFAULT_TRANSFORM_DIR, workers=DEFAULT_WORKERS):
+        self.transform = transform
+        # absolute, the forkserver keeps the working directory it was started in
+        self.directory = Path(directory).resolve()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # workers start lazily from inside the threaded pipeline; a forked one would inherit whatever locks
+        # the other threads hold at that moment (the image cache's flock among them), so they come from a forkserver
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+
+    def submit(self, source_path):
+        digest = hashlib.sha256(Path(source_path).read_bytes()).hexdigest()
+        output_path = str(self.directory / f"{digest}-{self.transform.key()}{EXTENSIONS[self.transform.format]}")
+        if os.path.exists(output_path):
+            done = Future()
+            done.set_result(output_path)
+            return done
+        return self._pool.submit(transform_image, os.path.abspath(source_path), output_path, self.transform)
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+def transform_stage(transformer, workers=DEFAULT_WORKERS):
+    def run(job):
+        source = job.results["download"]
+        if not source:
+            return None
+        try:
+            return transformer.submit(source).result()
+        except Exception as e:
+            job.log(f"[WARN] Could not transform {source}, uploading the original: {e}")
+            return source
+
+    return Stage("transform", run, workers=workers)
+
+
+def add_transform_arguments(parser):
+    parser.add_argument("--max-dimension", type=int, help="downscale images to fit this many pixels before uploading")
+    parser.add_argument("--image-format", choices=sorted(EXTENSIONS), default=ImageTransform.format, help="format to re-encode resized images to")
+    parser.add_argument("--image-quality", type=int, default=ImageTransform.quality, help="encoder quality for resized images")
+
+
+def transformer_from_args(args):
+    if not args.max_dimension:
+        return None
+    return ImageTransformer(ImageTransform(args.max_dimension, args.image_format, args.image_quality))
@@ -0,0 +1,102 @@
+import csv
+import os
+import re
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlparse
+
+from name.metrics import METRICS
+from name.posting import ITEM_DATA
+
+# the kaikaikiki scraper joins the host and the cardlist's relative image paths without a slash
+GLUED_PATH = re.compile(r"^(https?://[^/]+\.com)(assets/)")
+CURRENCY_SIGNS = "$€£¥"
+
+
+@dataclass(frozen=True)
+class Problem:
+    row: int  # 1 based, the csv line is row + 1
+    key: str
+    message: str
+
+    def __str__(self):
+        return f"row {self.row} ({self.key or 'no id'}): {self.message}"
+
+
+def normalize_url(url):
+    url = GLUED_PATH.sub(r"\1/\2", url.strip())
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError(f"{url!r} is not an http(s) url")
+    return url
+
+
+def normalize_price(value):
+    try:
+        price = Decimal(value.strip().strip(CURRENCY_SIGNS).strip())
+    except InvalidOperation:
+        raise ValueError(f"price {value!r} is not a number") from None
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"price {value!r} is not a positive amount")
+    return format(price, "f")
+
+
+def required_columns(card_format, resource, item_data=ITEM_DATA):
+    columns = list(card_format.columns)
+    if resource == "items":
+        columns += [column for _, column in item_data if column not in columns]
+    return columns
+
+
+def validate_cards(cards, card_format, resource, item_data=ITEM_DATA):
+    # one pass over the whole input before anything is sent: the normalized rows that can be posted,
+    # and one problem per row that would fail or be skipped halfway
+    columns = required_columns(card_format, resource, item_data)
+    clean = []
+    problems = []
+    seen = {}
+    with METRICS.phase("validate"):
+        for row, card in enumerate(cards, 1):
+            key = (card.get(card_format.key) or "").strip()
+            messages = []
+            missing = [column for column in columns if card.get(column) is None]
+            if missing:
+                messages.append(f"missing column(s) {', '.join(missing)}")
+            empty = [column for column in card_format.required if column not in missing and not card[column].strip()]
+            if empty:
+                messages.append(f"empty {', '.join(empty)}")
+            card = {column: value.strip() if isinstance(value, str) else value for column, value in card.items()}
+            for column, normalize in ((card_format.image, normalize_url), (card_format.price, normalize_price)):
+                if column and card.get(column):
+                    try:
+                        card[column] = normalize(card[column])
+                    except ValueError as e:
+                        messages.append(str(e))
+            if key and key in seen:
+                messages.append(f"duplicate {card_format.key} of row {seen[key]}")
+            seen.setdefault(key, row)
+            if messages:
+                problems.append(Problem(row, key, "; ".join(messages)))
+            else:
+                clean.append(card)
+    return clean, problems
+
+
+def print_problems(problems, source, log=print):
+    for problem in problems:
+        log(f"[SKIP] {source} {problem}")
+    if problems:
+        log(f"[WARN] {len(problems)} row(s) of {source} failed validation")
+
+
+def clean_path(csv_file):
+    return f"{os.path.splitext(csv_file)[0]}.clean.csv"
+
+
+def write_clean_csv(cards, fieldnames, output_file):
+    tmp = f"{output_file}.tmp"
+    with METRICS.phase("csv"), open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(cards)
+    os.replace(tmp, output_file)
@@ -0,0 +1,70 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+FIXTURES = Path(__file__).parent / "fixtures"
+# url path pattern -> saved page, mirrors the layout of the live sites
+ROUTES = [
+    (re.compile(r"^/cards/\w+/\w+$"), "limitless_card.html"),
+    (re.compile(r"^/cards/\w+$"), "limitless_set.html"),
+    (re.compile(r"^/cardlist\.html$"), "kaikaikiki_cardlist.html"),
+]
+# /empty answers 200 without a body, as a crashed page renderer sometimes does
+# /padded/<path> serves the page at <path> with a megabyte of rows before </body>, like a long discogs release page
+PADDING = b"".join(b"<tr><td>%d</td><td>filler track title</td></tr>\n" % n for n in range(20000))
+
+
+def read_fixture(name):
+    return (FIXTURES / name).read_bytes()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # streaming clients hang up once they have what they came for
+            pass
+
+    def do_GET(self):
+        path, padded = self.path, self.path.startswith("/padded/")
+        if padded:
+            path = path[len("/padded"):]
+        if path == "/empty":
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        for pattern, name in ROUTES:
+            if pattern.match(path):
+                body = read_fixture(name)
+                if padded:
+                    body = body.replace(b"</body>", b"<table>" + PADDING + b"</table></body>")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                break
+        else:
+            body = b"not found"
+            self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
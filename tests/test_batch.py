@@ -0,0 +1,58 @@
+import csv
+
+import pytest
+
+from name.batch import interleave, load_manifest, run_batch
+from name.images import ImageCache
+from name.koillection import KoillectionClient
+from name.mock_server import MockKoillection
+
+WISHLIST = "00000000-0000-4000-8000-000000000001"
+COLLECTION = "00000000-0000-4000-8000-000000000002"
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_interleave_is_round_robin():
+    assert list(interleave([[1, 2, 3, 4], ["a"], ["x", "y"]])) == [1, "a", "x", 2, "y", 3, 4]
+
+
+def test_load_manifest_rejects_bad_jobs(tmp_path):
+    manifest = tmp_path / "batch.toml"
+    manifest.write_text(f'[[job]]\ncsv = "SP.csv"\nwishlist = "{WISHLIST}"\nformat = "murakami"\n')
+    assert load_manifest(manifest)[0]["format"] == "murakami"
+    for body in (
+        f'[[job]]\ncsv = "SP.csv"\nwishlist = "{WISHLIST}"\ncollection = "{COLLECTION}"\n',
+        f'[[job]]\ncsv = "SP.csv"\nwishlist = "{WISHLIST}"\n[[job]]\ncsv = "SP.csv"\ncollection = "{COLLECTION}"\n',
+        f'[[job]]\ncsv = "SP.csv"\nwishlist = "{WISHLIST}"\nformt = "murakami"\n',
+    ):
+        manifest.write_text(body)
+        with pytest.raises(ValueError):
+            load_manifest(manifest)
+
+
+def test_batch_shares_one_client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with MockKoillection() as mock:
+        write_csv("BS.csv", [{"URL": f"https://limitlesstcg.com/cards/BS/{n}", "Image URL": f"{mock.url}/images/bs{n}.png",
+                              "Name": f"Card {n}", "Price": "1.00"} for n in range(3)])
+        write_csv("MMK.csv", [{"id": f"MMK-00{n}", "name": f"Flower {n}", "image_url": f"{mock.url}/images/mmk{n}.png",
+                               "description": "", "rarity": "C"} for n in range(2)])
+        entries = [
+            {"csv": "BS.csv", "wishlist": WISHLIST, "posted-csv": "posted.csv"},
+            {"csv": "MMK.csv", "collection": COLLECTION},
+        ]
+        client = KoillectionClient("user", "pass", mock.url)
+        jobs = run_batch(client, entries, ImageCache(tmp_path / "image"))
+
+        assert [job.target.name for job in jobs] == ["BS.csv", "MMK.csv", "BS.csv", "MMK.csv", "BS.csv"]
+        assert len(mock.records["wishes"]) == 3
+        assert len(mock.records["items"]) == 2
+        assert len(mock.records["data"]) == 6
+        assert sum(entry["path"] == "/api/authentication_token" for entry in mock.log) == 1
+        assert (tmp_path / "posted.csv").exists()
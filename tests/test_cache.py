@@ -0,0 +1,68 @@
+import pytest
+
+from name.cache import CacheMiss, ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise CacheMiss(str(self.status_code))
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers or {}))
+        return self.responses.pop(0)
+
+
+def test_revalidates_with_etag_and_reuses_body_on_304(tmp_path):
+    cache = ResponseCache(tmp_path)
+    session = FakeSession(
+        FakeResponse(200, b"<html>cards</html>", {"ETag": '"v1"'}),
+        FakeResponse(304),
+    )
+    assert cache.get("https://example.com/a", session) == b"<html>cards</html>"
+    assert cache.get("https://example.com/a", session) == b"<html>cards</html>"
+    assert session.requests[1][1] == {"If-None-Match": '"v1"'}
+
+
+def test_offline_mode_serves_only_cached_pages(tmp_path):
+    ResponseCache(tmp_path).get("https://example.com/a", FakeSession(FakeResponse(200, b"a")))
+    offline = ResponseCache(tmp_path, offline=True)
+    assert offline.get("https://example.com/a") == b"a"
+    with pytest.raises(CacheMiss):
+        offline.get("https://example.com/b")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=8)
+    session = FakeSession(*(FakeResponse(200, b"1234") for _ in range(3)))
+    cache.get("https://example.com/a", session)
+    cache.get("https://example.com/b", session)
+    cache.offline = True
+    cache.get("https://example.com/a")
+    cache.offline = False
+    cache.get("https://example.com/c", session)
+    cache.offline = True
+    assert cache.get("https://example.com/a") == b"1234"
+    with pytest.raises(CacheMiss):
+        cache.get("https://example.com/b")
+
+
+def test_caches_sharing_a_directory_keep_each_others_entries(tmp_path):
+    # two runs side by side, each with its own in-memory copy of the index
+    first, second = ResponseCache(tmp_path), ResponseCache(tmp_path)
+    first.get("https://example.com/a", FakeSession(FakeResponse(200, b"a")))
+    second.get("https://example.com/b", FakeSession(FakeResponse(200, b"b")))
+    offline = ResponseCache(tmp_path, offline=True)
+    assert (offline.get("https://example.com/a"), offline.get("https://example.com/b")) == (b"a", b"b")
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,71 @@
+import csv
+
+from name.catalog import Catalog, card_key
+from name.cli import main
+from name.mock_server import MockKoillection
+
+WISHLIST = "00000000-0000-4000-8000-000000000000"
+
+
+def limitless_card(number, base="https://limitlesstcg.com", price="1.00"):
+    return {"URL": f"{base}/cards/BS/{number}", "Image URL": f"{base}/images/{number}.png", "Name": f"Card {number}",
+            "Number": f"#{number} · Rare", "Set": "Base Set (BS)", "Price": price}
+
+
+def test_card_key():
+    assert card_key(limitless_card(7), "pokemon") == ("BS", "7")
+    assert card_key({"id": "MMKPR-012", "name": "Flower"}, "murakami") == ("MMKPR", "MMKPR-012")
+
+
+def test_upsert_keeps_scrape_order_and_updates(tmp_path):
+    with Catalog(tmp_path / "catalog.sqlite") as catalog:
+        catalog.upsert([limitless_card(n) for n in (1, 2, 9, 10)], "pokemon")
+        catalog.upsert([limitless_card(2, price="5.00")], "pokemon")
+        catalog.upsert([{"id": "SP-001", "name": "Girl", "image_url": "", "description": "", "rarity": "C"}], "murakami")
+
+        assert [card["Name"] for card in catalog.cards(["BS"])] == ["Card 1", "Card 2", "Card 9", "Card 10"]
+        assert [card["Price"] for card in catalog.cards(["BS"])][1] == "5.00"
+        assert [card["name"] for card in catalog.cards(["SP"])] == ["Girl"]
+
+        catalog.record_posting(limitless_card(1), "pokemon", "wishes", f"/api/wishlists/{WISHLIST}", "w1")
+        assert [card["Name"] for card in catalog.cards(["BS"], missing_from_resource="wishes")] == ["Card 2", "Card 9", "Card 10"]
+        assert len(list(catalog.cards(missing_from_resource="items"))) == 5
+
+
+def test_import_keeps_columns_and_posted_csvs_become_postings(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    rows = [limitless_card(n) for n in (1, 2)]
+    for name, fieldnames in (("BS.csv", list(rows[0])), ("posted_cards.csv", ["Name", "URL", "Price", "ID", "Image File"])):
+        with open(name, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "Price": "9.00", "ID": f"w{row['Name'][-1]}", "Image File": "image/card.png"})
+    with Catalog("catalog.sqlite") as catalog:
+        catalog.upsert(rows, "pokemon")
+    # the posted csv is skipped without a wishlist, and never replaces the image urls of the stored cards
+    assert main(["catalog", "import", "BS.csv", "posted_cards.csv"]) == 0
+    assert "[SKIP] posted_cards.csv lists posted wishes" in capsys.readouterr().out
+    assert main(["catalog", "import", "posted_cards.csv", "--wishlist", WISHLIST]) == 0
+    with Catalog("catalog.sqlite") as catalog:
+        assert [card["Image URL"] for card in catalog.cards(["BS"])] == [row["Image URL"] for row in rows]
+        assert list(catalog.cards(["BS"], missing_from_target=f"/api/wishlists/{WISHLIST}")) == []
+
+        # a csv without some columns only updates the ones it has
+        catalog.upsert([{"URL": rows[0]["URL"], "Name": "Card 1", "Price": "2.00"}], "pokemon")
+        card = next(catalog.cards(["BS"]))
+        assert (card["Price"], card["Image URL"], card["Number"]) == ("2.00", rows[0]["Image URL"], rows[0]["Number"])
+
+
+def test_post_from_catalog_records_remote_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "credentials.txt").write_text("username: user\npassword: pass\n")
+    with MockKoillection() as mock:
+        with Catalog("catalog.sqlite") as catalog:
+            catalog.upsert([limitless_card(n, base=mock.url) for n in (1, 2, 3)], "pokemon")
+            catalog.record_posting(limitless_card(2, base=mock.url), "pokemon", "wishes", f"/api/wishlists/{WISHLIST}", "old")
+
+        assert main(["post-wishes", "--set", "BS", "--missing", "--wishlist", WISHLIST, "--domain", mock.url]) == 0
+        assert sorted(wish["name"] for wish in mock.records["wishes"].values()) == ["Card 1", "Card 3"]
+        with Catalog("catalog.sqlite") as catalog:
+            assert list(catalog.cards(["BS"], missing_from_target=f"/api/wishlists/{WISHLIST}")) == []
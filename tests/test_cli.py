@@ -0,0 +1,88 @@
+import csv
+import subprocess
+import sys
+
+import pytest
+
+from name.cli import COMMANDS, build_parser, main
+from name.mock_server import MockKoillection
+
+WISHLIST = "00000000-0000-4000-8000-000000000000"
+
+
+@pytest.mark.parametrize("argv", [["--help"]] + [[command, "--help"] for command in COMMANDS])
+def test_help_does_not_import_heavy_modules(argv):
+    code = f"import sys\nfrom name.cli import main\ntry:\n    main({argv!r})\nexcept SystemExit:\n    pass\n" \
+           "print(sorted(m for m in ('requests', 'lxml', 'PIL') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "[]"
+
+
+def test_config_defaults(tmp_path):
+    config = tmp_path / "tools.toml"
+    config.write_text(f'credentials = "secrets.txt"\nworkers = 9\n\n[post-wishes]\nwishlist = "{WISHLIST}"\nformat = "murakami"\n')
+    args = build_parser("post-wishes", config).parse_args(["cards.csv"])
+    assert (args.wishlist, args.format, args.credentials) == (WISHLIST, "murakami", "secrets.txt")
+    # flags still win over the file
+    assert build_parser("post-wishes", config).parse_args(["cards.csv", "--format", "pokemon"]).format == "pokemon"
+
+    config.write_text("[post-wishes]\nwishlsit = 1\n")
+    with pytest.raises(SystemExit):
+        build_parser("post-wishes", config)
+
+
+def test_endpoint_limits_from_config_and_flags(tmp_path):
+    from name.ratelimit import limits_from_args
+
+    config = tmp_path / "tools.toml"
+    config.write_text('[limits.image]\nrate = 0.5\nmax-rate = 4\n\n[limits.wishes]\nburst = 3\n')
+    args = build_parser("post-wishes", config).parse_args(["cards.csv", "--wishlist", WISHLIST, "--limit", "image=max_rate:2", "--limit", "data=rate:8"])
+    assert args.limits == {"image": {"rate": 0.5, "max_rate": 2.0}, "wishes": {"burst": 3.0}, "data": {"rate": 8.0}}
+    limits = limits_from_args(args)
+    image = limits.for_path("/api/wishes/1/image")
+    assert (image.rate, image.max_rate, limits.for_path("/api/wishes").burst) == (0.5, 2.0, 3.0)
+    # the data endpoint keeps its default ceiling
+    assert limits.for_path("/api/data").max_rate == 40.0
+
+    with pytest.raises(SystemExit):
+        build_parser("post-wishes").parse_args(["cards.csv", "--wishlist", WISHLIST, "--limit", "image=speed:2"])
+    config.write_text('[limits.image]\nrate = "fast"\n')
+    with pytest.raises(ValueError, match="must be a number"):
+        limits_from_args(build_parser("post-wishes", config).parse_args(["cards.csv", "--wishlist", WISHLIST]))
+
+
+def test_post_wishes_and_sync(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "credentials.txt").write_text("username: user\npassword: pass\n")
+    with MockKoillection() as mock:
+        with open(tmp_path / "BS.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["URL", "Image URL", "Name", "Number", "Set", "Price"])
+            writer.writeheader()
+            for n in (1, 2):
+                writer.writerow({"URL": f"https://limitlesstcg.com/cards/BS/{n}", "Image URL": f"{mock.url}/images/{n}.png",
+                                 "Name": f"Card {n}", "Number": f"#{n}", "Set": "Base Set (BS)", "Price": "1.00"})
+        wishlist = f"{mock.url}/wishlists/{WISHLIST}"
+
+        assert main(["post-wishes", "BS.csv", "--wishlist", wishlist, "--domain", mock.url, "--posted-csv", "posted.csv"]) == 0
+        assert sorted(wish["name"] for wish in mock.records["wishes"].values()) == ["Card 1", "Card 2"]
+        assert set(mock.images) == set(mock.records["wishes"])
+        with open(tmp_path / "posted.csv", newline="", encoding="utf-8") as f:
+            assert [row["Name"] for row in csv.DictReader(f)] == ["Card 1", "Card 2"]
+
+        assert main(["sync", "BS.csv", "--wishlist", wishlist, "--domain", mock.url]) == 0
+        assert len(mock.records["wishes"]) == 2
+
+
+def test_post_wishes_from_delta_clears_the_posted_cards(tmp_path, monkeypatch):
+    from name.kaikaikiki import load_delta, write_delta
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "credentials.txt").write_text("username: user\npassword: pass\n")
+    with MockKoillection() as mock:
+        added = [{"id": f"MMK-00{n}", "name": f"Flower {n}", "image_url": f"{mock.url}/images/mmk{n}.png", "description": "", "rarity": "C"}
+                 for n in (1, 2)]
+        write_delta({"MMK": {"added": added, "changed": [], "removed": []}}, "mononoke_delta.json")
+        # no --format, a delta always holds murakami cards
+        assert main(["post-wishes", "--delta", "mononoke_delta.json", "--wishlist", WISHLIST, "--domain", mock.url]) == 0
+        assert sorted(wish["name"] for wish in mock.records["wishes"].values()) == ["Flower 1", "Flower 2"]
+        assert load_delta("mononoke_delta.json") == []
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from name.fetch import HostLimiter, thread_session
+
+
+def test_thread_session_is_per_thread():
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(thread_session()))
+    thread.start()
+    thread.join()
+    assert thread_session() is thread_session()
+    assert sessions[0] is not thread_session()
+
+
+def test_host_limiter_caps_concurrency():
+    limiter = HostLimiter(2)
+    lock = threading.Lock()
+    active = peak = 0
+
+    def work():
+        nonlocal active, peak
+        with limiter.slot("https://limitlesstcg.com/cards/BS/1"):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
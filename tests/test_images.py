@@ -0,0 +1,99 @@
+import json
+import multiprocessing
+
+from name.cache import TOUCH_BATCH
+from name.cli import build_parser
+from name.images import INDEX_FILE, ImageCache
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.requests = []
+
+    def get(self, url):
+        self.requests.append(url)
+        return FakeResponse(self.bodies[url])
+
+
+def test_second_fetch_hits_the_cache(tmp_path):
+    session = FakeSession({"https://img.example/a.png": b"a"})
+    path, cached = ImageCache(tmp_path).fetch("https://img.example/a.png", session)
+    assert not cached
+    assert ImageCache(tmp_path).fetch("https://img.example/a.png", session) == (path, True)
+    assert session.requests == ["https://img.example/a.png"]
+
+
+def test_identical_bytes_are_stored_once(tmp_path):
+    session = FakeSession({"https://img.example/a.png": b"same", "https://mirror.example/b.png": b"same"})
+    cache = ImageCache(tmp_path)
+    first, _ = cache.fetch("https://img.example/a.png", session)
+    second, _ = cache.fetch("https://mirror.example/b.png", session)
+    assert first == second
+
+
+def test_evicts_least_recently_used(tmp_path):
+    session = FakeSession({f"https://img.example/{n}.png": n.encode() * 4 for n in "abc"})
+    cache = ImageCache(tmp_path, max_bytes=8)
+    cache.fetch("https://img.example/a.png", session)
+    cache.fetch("https://img.example/b.png", session)
+    cache.fetch("https://img.example/a.png", session)
+    cache.fetch("https://img.example/c.png", session)
+    assert cache.fetch("https://img.example/a.png", session)[1]
+    assert not cache.fetch("https://img.example/b.png", session)[1]
+
+
+def _fetch_many(directory, tag):
+    session = FakeSession({f"https://img.example/{tag}/{n}.png": f"{tag}{n}".encode() for n in range(100)})
+    cache = ImageCache(directory)
+    for url in session.bodies:
+        cache.fetch(url, session)
+
+
+def test_processes_sharing_a_directory_keep_every_entry(tmp_path):
+    workers = [multiprocessing.get_context("fork").Process(target=_fetch_many, args=(tmp_path, tag)) for tag in "ab"]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+    with open(tmp_path / INDEX_FILE, encoding="utf-8") as f:
+        assert len(json.load(f)["urls"]) == 200
+
+
+def test_hits_only_write_the_index_once_a_batch_piled_up(tmp_path):
+    urls = [f"https://img.example/{n}.png" for n in range(TOUCH_BATCH)]
+    session = FakeSession({url: url.encode() for url in urls})
+    cache = ImageCache(tmp_path)
+    for url in urls:
+        cache.fetch(url, session)
+    index = tmp_path / INDEX_FILE
+    written = index.stat().st_mtime_ns, index.read_bytes()
+    for url in urls[:-1]:
+        assert cache.fetch(url, session)[1]
+    assert (index.stat().st_mtime_ns, index.read_bytes()) == written
+    # the last hit fills the batch, and every touched entry gets its new time
+    cache.fetch(urls[-1], session)
+    before = {digest: blob["used"] for digest, blob in json.loads(written[1])["blobs"].items()}
+    with open(index, encoding="utf-8") as f:
+        after = {digest: blob["used"] for digest, blob in json.load(f)["blobs"].items()}
+    assert all(after[digest] > used for digest, used in before.items())
+
+    # what another cache stores is seen by the next lookup here without a restart
+    other = FakeSession({"https://img.example/new.png": b"new"})
+    ImageCache(tmp_path).fetch("https://img.example/new.png", other)
+    assert cache.fetch("https://img.example/new.png", other)[1]
+
+
+def test_image_cache_cap_is_an_option():
+    args = build_parser("post-items").parse_args(["cards.csv", "--collection", "x", "--image-cache-max-mb", "64"])
+    assert args.image_cache_max_mb == 64
+    assert build_parser("post-items").parse_args(["cards.csv", "--collection", "x"]).image_cache_max_mb == 1024
@@ -0,0 +1,45 @@
+from name.journal import Journal
+
+
+def test_resume_skips_recorded_stages(tmp_path):
+    path = tmp_path / "SP.csv.journal"
+    with Journal(path) as journal:
+        journal.record("SP-001", "create", "wish-1")
+        journal.record("SP-001", "upload")
+        journal.record("SP-002", "create", "wish-2")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"card": "SP-002", "sta')
+
+    with Journal(path, resume=True) as journal:
+        assert journal.get("SP-001", "create") == "wish-1"
+        assert journal.done("SP-001", "upload")
+        assert journal.get("SP-002", "create") == "wish-2"
+        assert not journal.done("SP-002", "upload")
+        journal.record("SP-002", "upload")
+
+    with Journal(path, resume=True) as journal:
+        assert journal.done("SP-002", "upload")
+
+
+def test_fresh_run_starts_an_empty_journal(tmp_path):
+    path = tmp_path / "SP.csv.journal"
+    with Journal(path) as journal:
+        journal.record("SP-001", "create", "wish-1")
+    with Journal(path) as journal:
+        assert not journal.done("SP-001", "create")
+
+
+def test_resume_ignores_steps_of_another_target(tmp_path):
+    path = tmp_path / "SP.csv.journal"
+    with Journal(path, target="/api/wishlists/a") as journal:
+        journal.record("SP-001", "create", "wish-1")
+        journal.record("SP-001", "upload")
+    with Journal(path, resume=True, target="/api/wishlists/b") as journal:
+        assert not journal.done("SP-001", "create")
+        assert journal.foreign == 2
+        journal.record("SP-001", "create", "wish-9")
+    # both targets keep their own progress in the one file
+    with Journal(path, resume=True, target="/api/wishlists/a") as journal:
+        assert (journal.get("SP-001", "create"), journal.done("SP-001", "upload")) == ("wish-1", True)
+    with Journal(path, resume=True, target="/api/wishlists/b") as journal:
+        assert (journal.get("SP-001", "create"), journal.done("SP-001", "upload")) == ("wish-9", False)
@@ -0,0 +1,102 @@
+import lxml.html
+
+from name.kaikaikiki import card_hash, clear_delta, delta_path, load_delta, parse_cardlist, write_delta, write_set_csvs
+
+CARDLIST = """
+<html><body>
+<div id="JP_MMK-001R" class="p-modal">
+  <div class="p-modalHead">
+    <div class="p-modalHeadTitle">Smiling Flower</div>
+    <div class="p-modalHeadTitle is-jp">笑顔の花</div>
+    <div class="p-modalHeadInfo"><div class="p-modalHeadInfo__rare is-sr">SR</div></div>
+  </div>
+  <img src="/assets/img/MMK-001.png">
+  <div class="p-modalContent"><p>first line<br>  second <b>line</b> <br/>third</p><p>ignored</p></div>
+</div>
+<div id="MMK-001"><img src="/assets/img/duplicate.png"></div>
+<div id="MMKPR-002">
+  <div class="p-modalHead"><div class="p-modalHeadTitle">Promo</div></div>
+  <img src="https://cdn.example.com/MMKPR-002.png">
+  <div class="p-modalInner"><div class="p-modalImg"><p class="p-modalContent__txt is-jp">fallback<br>text</p></div></div>
+</div>
+<div id="MMK-003"><div class="p-modalHead"><div class="p-modalHeadTitle">No image</div></div></div>
+</body></html>
+"""
+
+
+def test_parse_cardlist():
+    doc = lxml.html.fromstring(CARDLIST)
+    cards = parse_cardlist(doc, ["MMK", "MMKPR"], "https://mmktc.kaikaikiki.com")
+    assert cards["MMK"] == {
+        "MMK-001": {
+            "id": "MMK-001",
+            "name": "笑顔の花",
+            "image_url": "https://mmktc.kaikaikiki.com/assets/img/MMK-001.png",
+            "description": "first line\nsecond line\nthird",
+            "rarity": "SR",
+        }
+    }
+    assert cards["MMKPR"]["MMKPR-002"]["name"] == "Promo"
+    assert cards["MMKPR"]["MMKPR-002"]["image_url"] == "https://cdn.example.com/MMKPR-002.png"
+    assert cards["MMKPR"]["MMKPR-002"]["description"] == "fallback\ntext"
+    assert cards["MMKPR"]["MMKPR-002"]["rarity"] == "n/a"
+
+
+def card(card_id, name="Flower", description="line"):
+    return {"id": card_id, "name": name, "image_url": f"https://mmktc.kaikaikiki.com/{card_id}.png", "description": description, "rarity": "C"}
+
+
+def test_card_hash_ignores_whitespace_noise():
+    assert card_hash(card("MMK-001", description="a  b\n c ")) == card_hash(card("MMK-001", description="a b\nc"))
+    assert card_hash(card("MMK-001", name="Flower")) != card_hash(card("MMK-001", name="Flowers"))
+
+
+def test_write_set_csvs_only_rewrites_changed_sets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = {"MMK": {c["id"]: c for c in (card("MMK-001"), card("MMK-002"))}, "MMKPR": {"MMKPR-001": card("MMKPR-001")}}
+    deltas = write_set_csvs(first, "mononoke_")
+    assert [c["id"] for c in deltas["MMK"]["added"]] == ["MMK-001", "MMK-002"]
+
+    (tmp_path / "mononoke_MMKPR.csv").write_text((tmp_path / "mononoke_MMKPR.csv").read_text() + "\n")
+    marker = (tmp_path / "mononoke_MMKPR.csv").read_text()
+    second = {"MMK": {c["id"]: c for c in (card("MMK-001", name="Renamed"), card("MMK-003"))}, "MMKPR": first["MMKPR"]}
+    deltas = write_set_csvs(second, "mononoke_")
+    assert [c["id"] for c in deltas["MMK"]["added"]] == ["MMK-003"]
+    assert [c["name"] for c in deltas["MMK"]["changed"]] == ["Renamed"]
+    assert deltas["MMK"]["removed"] == ["MMK-002"]
+    assert not any(deltas["MMKPR"].values())
+    assert (tmp_path / "mononoke_MMKPR.csv").read_text() == marker
+
+    write_delta(deltas, delta_path("mononoke_"))
+    assert [c["id"] for c in load_delta("mononoke_delta.json")] == ["MMK-003"]
+    assert load_delta("mononoke_delta.json", sets=["MMKPR"]) == []
+
+    # a set that comes back empty is diffed like any other, only its csv stays as it was
+    deltas = write_set_csvs({"MMK": second["MMK"], "MMKPR": {}}, "mononoke_")
+    assert deltas["MMKPR"] == {"added": [], "changed": [], "removed": ["MMKPR-001"]}
+    assert (tmp_path / "mononoke_MMKPR.csv").read_text() == marker
+
+
+def test_delta_keeps_added_cards_until_they_are_posted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = delta_path("mononoke_")
+    write_delta(write_set_csvs({"MMK": {"MMK-001": card("MMK-001")}}, "mononoke_"), path)
+    clear_delta(path, ["MMK-001"])
+
+    night = {"MMK": {c["id"]: c for c in (card("MMK-001"), card("MMK-002"))}}
+    write_delta(write_set_csvs(night, "mononoke_"), path)
+    # an unchanged scrape before the posting run leaves MMK-002 pending
+    write_delta(write_set_csvs(night, "mononoke_"), path)
+    assert [c["id"] for c in load_delta(path)] == ["MMK-002"]
+
+    # a pending card that changes is still posted as new, one that disappears is dropped
+    night["MMK"]["MMK-002"] = card("MMK-002", name="Renamed")
+    night["MMK"]["MMK-003"] = card("MMK-003")
+    write_delta(write_set_csvs(night, "mononoke_"), path)
+    assert [(c["id"], c["name"]) for c in load_delta(path)] == [("MMK-002", "Renamed"), ("MMK-003", "Flower")]
+    del night["MMK"]["MMK-003"]
+    write_delta(write_set_csvs(night, "mononoke_"), path)
+    assert [c["id"] for c in load_delta(path)] == ["MMK-002"]
+
+    assert clear_delta(path, ["MMK-002"]) == 0
+    assert load_delta(path) == []
@@ -0,0 +1,84 @@
+import base64
+import json
+import time
+
+from name.koillection import KoillectionClient, token_expiry
+from name.ratelimit import EndpointLimits
+
+UNLIMITED = {"rate": 1000.0, "max_rate": 1000.0, "burst": 1000}
+
+
+def make_token(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        assert self.status_code < 400
+
+
+class FakeSession:
+    def __init__(self, tokens, statuses=()):
+        self.tokens = list(tokens)
+        self.statuses = list(statuses)
+        self.auth_calls = 0
+        self.seen_tokens = []
+
+    def post(self, url, json=None):
+        self.auth_calls += 1
+        return FakeResponse(200, {"token": self.tokens.pop(0)})
+
+    def request(self, method, url, headers=None, files=None, **kwargs):
+        self.seen_tokens.append(headers["Authorization"])
+        status = self.statuses.pop(0) if self.statuses else 201
+        return FakeResponse(status, {"id": "abc"})
+
+
+def make_client(session):
+    limits = EndpointLimits({key: UNLIMITED for key in ("wishes", "items", "data", "image")})
+    return KoillectionClient("user", "pass", "https://koillection.test", session, limits)
+
+
+def test_token_expiry():
+    assert token_expiry(make_token(1700000000)) == 1700000000
+    assert token_expiry("not-a-jwt") is None
+
+
+def test_reuses_token_until_it_expires():
+    session = FakeSession([make_token(time.time() + 3600)])
+    client = make_client(session)
+    for _ in range(30):
+        assert client.create_wish({"name": "Pikachu"}) == "abc"
+    assert session.auth_calls == 1
+
+
+def test_refreshes_expiring_token():
+    session = FakeSession([make_token(time.time() + 10), make_token(time.time() + 3600)])
+    client = make_client(session)
+    client.create_item({"name": "Flower"})
+    client.create_item({"name": "Skull"})
+    assert session.auth_calls == 2
+
+
+def test_reauthenticates_once_on_401():
+    first, second = make_token(time.time() + 3600), make_token(time.time() + 7200)
+    session = FakeSession([first, second], statuses=[401, 201])
+    client = make_client(session)
+    assert client.create_datum("item-id", "Rarity", "SR") == "abc"
+    assert session.seen_tokens == [f"Bearer {first}", f"Bearer {second}"]
+
+
+def test_retries_throttled_requests():
+    session = FakeSession([make_token(time.time() + 3600)], statuses=[429, 503, 201])
+    client = make_client(session)
+    assert client.create_wish({"name": "Pikachu"}) == "abc"
+    assert len(session.seen_tokens) == 3
@@ -0,0 +1,63 @@
+from conftest import read_fixture
+from name import limitless
+from name.limitless import _parse_card, fetch_and_extract, parse_card, parse_set_index, scrape, scrape_set
+
+
+def test_parse_card():
+    assert parse_card(read_fixture("limitless_card.html"), "https://limitlesstcg.com/cards/BS/1") == {
+        "URL": "https://limitlesstcg.com/cards/BS/1",
+        "Image URL": "https://images.pokemontcg.io/base1/1_hires.png",
+        "Name": "Alakazam",
+        "Number": "#1 · Holo Rare",
+        "Set": "Base Set (BS)",
+        "Price": "46.67",
+    }
+
+
+def test_scrape_keeps_card_order(fixture_server):
+    urls = [f"{fixture_server}/cards/BS/{n}" for n in range(1, 9)] + [f"{fixture_server}/missing", f"{fixture_server}/empty"]
+    cards = scrape(urls, workers=4)
+    assert [card["URL"] for card in cards] == urls[:-2]
+    assert fetch_and_extract(urls[-2]) is None
+    assert fetch_and_extract(urls[-1]) is None
+
+
+def test_parse_set_index():
+    cards = parse_set_index(read_fixture("limitless_set.html"), "https://limitlesstcg.com/cards/BS", "BS")
+    assert [card["URL"].rsplit("/", 1)[1] for card in cards] == ["1", "2", "3", "10", "103"]
+    assert cards[0] == {
+        "URL": "https://limitlesstcg.com/cards/BS/1",
+        "Image URL": "https://images.pokemontcg.io/base1/1_hires.png",
+        "Name": "Alakazam",
+    }
+
+
+def test_scrape_set_only_visits_card_pages_it_needs(fixture_server, monkeypatch):
+    fetched = []
+    monkeypatch.setattr("name.limitless.parse_card", lambda content, url: fetched.append(url) or _parse_card(content, url))
+
+    cards = scrape_set("BS", ["URL", "Name", "Image URL"], base=fixture_server)
+    assert [card["Name"] for card in cards] == ["Alakazam", "Blastoise", "Chansey", "Mewtwo", "Pikachu"]
+    assert fetched == []
+
+    cards = scrape_set("BS", ["URL", "Name", "Set"], base=fixture_server)
+    assert {card["Set"] for card in cards} == {"Base Set (BS)"}
+    assert len(fetched) == 1
+
+    cards = scrape_set("BS", base=fixture_server)
+    assert len(fetched) == 6
+    # the card page fixture is always Alakazam, the per-card name from the index wins
+    assert [card["Name"] for card in cards][1] == "Blastoise"
+    assert cards[3]["Price"] == "46.67"
+    assert list(cards[3]) == ["URL", "Image URL", "Name", "Number", "Set", "Price"]
+
+
+def test_scrape_set_drops_a_card_whose_page_is_empty(fixture_server, monkeypatch, capsys):
+    fetch = limitless._fetch
+    monkeypatch.setattr("name.limitless._fetch", lambda url, *args: b"" if url.endswith("/BS/2") else fetch(url, *args))
+    cards = scrape_set("BS", base=fixture_server)
+    assert [card["URL"].rsplit("/", 1)[1] for card in cards] == ["1", "3", "10", "103"]
+    assert f"[ERROR] Parsing {fixture_server}/cards/BS/2" in capsys.readouterr().out
+
+    monkeypatch.setattr("name.limitless._fetch", lambda url, *args: b"")
+    assert scrape_set("BS", base=fixture_server) == []
@@ -0,0 +1,49 @@
+import json
+
+from name.fetch import new_session
+from name.metrics import Histogram, Metrics
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+
+
+def test_records_session_responses(fixture_server, monkeypatch):
+    metrics = Metrics()
+    monkeypatch.setattr("name.fetch.METRICS", metrics)
+    with new_session() as session:
+        session.get(f"{fixture_server}/cards/BS/1")
+        session.get(f"{fixture_server}/missing")
+    [entry] = metrics.snapshot()["requests"]
+    assert entry["endpoint"] == "default"
+    assert entry["count"] == 2
+    assert entry["statuses"] == {"200": 1, "404": 1}
+    assert entry["bytes_in"] > 1000
+
+
+def test_exports(tmp_path):
+    metrics = Metrics()
+    metrics.observe_request("https://koillection.test/api/items/1/image", 201, 0.3, sent=2048, received=10)
+    metrics.count_retry("/api/items", "429")
+    with metrics.phase("download"):
+        pass
+
+    metrics.write_json(tmp_path / "run.json")
+    data = json.loads((tmp_path / "run.json").read_text())
+    assert data["requests"][0]["endpoint"] == "image"
+    assert data["requests"][0]["bytes_out"] == 2048
+    assert data["retries"] == [{"endpoint": "items", "reason": "429", "count": 1}]
+    assert data["phases"]["download"]["runs"] == 1
+
+    metrics.write_prometheus(tmp_path / "run.prom")
+    text = (tmp_path / "run.prom").read_text()
+    labels = 'host="koillection.test",endpoint="image"'
+    assert f'koillection_tools_request_seconds_bucket{{{labels},le="0.25"}} 0' in text
+    assert f'koillection_tools_request_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f'koillection_tools_bytes_total{{{labels},direction="out"}} 2048' in text
+    assert 'koillection_tools_retries_total{endpoint="items",reason="429"} 1' in text
+    assert 'koillection_tools_phase_runs_total{phase="download"} 1' in text
@@ -0,0 +1,38 @@
+import requests
+
+from name.koillection import KoillectionClient
+from name.mock_server import MockKoillection
+from name.ratelimit import EndpointLimits
+from name.sync import fetch_all
+
+UNLIMITED = {"rate": 1000.0, "max_rate": 1000.0, "burst": 1000}
+
+
+def make_client(url):
+    limits = EndpointLimits({key: UNLIMITED for key in ("wishes", "items", "data", "image", "wishlists", "collections")})
+    return KoillectionClient("user", "pass", url, limits=limits)
+
+
+def test_client_round_trip(tmp_path):
+    image = tmp_path / "card.png"
+    image.write_bytes(b"png")
+    with MockKoillection() as mock:
+        client = make_client(mock.url)
+        item_id = client.create_item({"name": "Flower", "collection": "/api/collections/c1"})
+        client.create_datum(item_id, "Rarity", "SR")
+        client.upload_image("items", item_id, str(image))
+        for n in range(35):
+            client.create_wish({"name": f"Card {n}", "wishlist": "/api/wishlists/w1"})
+
+        assert mock.images == {item_id: mock.images[item_id]}
+        assert len(fetch_all(client, "/api/wishlists/w1/wishes")) == 35
+        assert [datum["label"] for datum in fetch_all(client, f"/api/items/{item_id}/data")] == ["Rarity"]
+
+
+def test_throttles_and_rejects_unknown_tokens():
+    with MockKoillection(rate_limit=1, retry_after=0) as mock:
+        assert requests.post(f"{mock.url}/api/authentication_token", json={}).status_code == 200
+        assert requests.post(f"{mock.url}/api/authentication_token", json={}).status_code == 429
+    with MockKoillection() as mock:
+        response = requests.post(f"{mock.url}/api/wishes", json={}, headers={"Authorization": "Bearer forged"})
+        assert response.status_code == 401
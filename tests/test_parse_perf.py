@@ -0,0 +1,85 @@
+import copy
+import csv
+import time
+from pathlib import Path
+
+import lxml.html
+import pytest
+import requests
+
+from conftest import read_fixture
+from name.kaikaikiki import parse_cardlist
+from name.limitless import fetch_and_extract, parse_card
+
+ROOT = Path(__file__).parent.parent
+SETS = ["MMK", "MMKPR", "MMKTC", "MKJW"]
+IMG_BASE = "https://mmktc.kaikaikiki.com"
+
+# per-card ceilings, several times what a plain laptop needs, so only a
+# markup or XPath change that makes parsing scale badly trips them
+LIMITLESS_PARSE_BUDGET = 0.005
+LIMITLESS_FETCH_BUDGET = 0.05
+CARDLIST_PARSE_BUDGET = 0.002
+
+
+def per_card(run, cards, rounds=3):
+    # best of a few rounds keeps a noisy neighbour from failing the gate
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best / cards
+
+
+def scaled_cardlist(count):
+    doc = lxml.html.fromstring(read_fixture("kaikaikiki_cardlist.html"))
+    modals = doc.find_class("p-modal")
+    wrap = modals[0].getparent()
+    for modal in modals:
+        wrap.remove(modal)
+    for n in range(count):
+        modal = copy.deepcopy(modals[n % len(modals)])
+        modal.set("id", f"JP_{SETS[n % len(SETS)]}-{n // len(SETS):03d}")
+        wrap.append(modal)
+    return lxml.html.tostring(doc)
+
+
+def test_cardlist_fixture_matches_scraped_csvs():
+    doc = lxml.html.fromstring(read_fixture("kaikaikiki_cardlist.html"))
+    cards_by_set = parse_cardlist(doc, SETS, IMG_BASE)
+    for set_prefix, cards in cards_by_set.items():
+        if not cards:
+            continue
+        with open(ROOT / f"mononoke_{set_prefix}.csv", newline="", encoding="utf-8") as f:
+            scraped = {row["id"]: row for row in csv.DictReader(f)}
+        for card_id, card in cards.items():
+            assert card == scraped[card_id]
+
+
+def test_limitless_parse_time():
+    content = read_fixture("limitless_card.html")
+    rounds = 200
+    elapsed = per_card(lambda: [parse_card(content, "https://limitlesstcg.com/cards/BS/1") for _ in range(rounds)], rounds)
+    assert elapsed < LIMITLESS_PARSE_BUDGET, f"{elapsed * 1000:.2f} ms per card"
+
+
+def test_limitless_fetch_time(fixture_server):
+    urls = [f"{fixture_server}/cards/BS/{n}" for n in range(1, 51)]
+    with requests.Session() as session:
+        fetch_and_extract(urls[0], session)  # open the connection outside the timing
+        elapsed = per_card(lambda: [fetch_and_extract(url, session) for url in urls], len(urls))
+    assert elapsed < LIMITLESS_FETCH_BUDGET, f"{elapsed * 1000:.2f} ms per card"
+
+
+@pytest.mark.parametrize("count", [100, 800])
+def test_cardlist_parse_time(count):
+    doc = lxml.html.fromstring(scaled_cardlist(count))
+    result = {}
+
+    def run():
+        result.update(parse_cardlist(doc, SETS, IMG_BASE))
+
+    elapsed = per_card(run, count)
+    assert sum(len(cards) for cards in result.values()) == count
+    assert elapsed < CARDLIST_PARSE_BUDGET, f"{elapsed * 1000:.3f} ms per card"
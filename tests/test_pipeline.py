@@ -0,0 +1,71 @@
+import random
+import threading
+import time
+
+from name.pipeline import SkipCard, Stage, run_pipeline
+
+
+def test_reports_cards_in_input_order():
+    reported = []
+
+    def slow_download(job):
+        time.sleep(random.uniform(0, 0.01))
+        job.log(f"downloaded {job.card['id']}")
+        return f"{job.card['id']}.png"
+
+    def create(job):
+        if job.card["id"] % 3 == 0:
+            raise SkipCard(f"[ERROR] Failed to add {job.card['id']}")
+        return f"wish-{job.card['id']}"
+
+    def upload(job):
+        job.log(f"uploaded {job.results['download']} to {job.results['create']}")
+
+    stages = [Stage("download", slow_download, workers=4), Stage("create", create, workers=2), Stage("upload", upload, workers=2)]
+    jobs = run_pipeline([{"id": i} for i in range(20)], stages, queue_size=2, report=reported.append)
+
+    assert [job.index for job in reported] == list(range(20))
+    assert [job.failed for job in jobs] == [i % 3 == 0 for i in range(20)]
+    assert jobs[3].messages == ["downloaded 3", "[ERROR] Failed to add 3"]
+    assert jobs[4].messages == ["downloaded 4", "uploaded 4.png to wish-4"]
+
+
+def test_stages_overlap():
+    active = set()
+    overlapped = threading.Event()
+
+    def track(name):
+        def run(job):
+            active.add(name)
+            if len(active) > 1:
+                overlapped.set()
+            time.sleep(0.01)
+            active.discard(name)
+        return run
+
+    run_pipeline([{} for _ in range(10)], [Stage("download", track("download")), Stage("upload", track("upload"))])
+    assert overlapped.is_set()
+
+
+def test_card_source_error_is_raised_after_the_cards_before_it():
+    reported = []
+    raised = []
+
+    def cards():
+        yield {"id": 0}
+        yield {"id": 1}
+        raise ValueError("line 3 is broken")
+
+    def run():
+        try:
+            run_pipeline(cards(), [Stage("create", lambda job: job.card["id"], workers=2)], report=reported.append)
+        except ValueError as e:
+            raised.append(e)
+
+    # in a thread so a pipeline that never finishes fails the test instead of hanging it
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert [str(e) for e in raised] == ["line 3 is broken"]
+    assert [job.index for job in reported] == [0, 1]
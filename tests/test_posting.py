@@ -0,0 +1,44 @@
+import csv
+
+import pytest
+
+from name.cli import main
+from name.mock_server import MockKoillection
+from name.posting import FORMATS, item_data, target_iri
+from name.validate import validate_cards
+
+UUID = "0b6c1f1e-53c5-4b8e-a1a8-5b7c1c1d2e3f"
+
+
+def test_target_iri():
+    assert target_iri(f"https://swag.swarsel.win/user/wishlists/{UUID}", "wishlists") == f"/api/wishlists/{UUID}"
+    assert target_iri(UUID, "collections") == f"/api/collections/{UUID}"
+    with pytest.raises(ValueError):
+        target_iri(f"https://swag.swarsel.win/user/collections/{UUID}", "wishlists")
+
+
+def test_item_data_come_from_config_and_go_out_with_the_image(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "credentials.txt").write_text("username: user\npassword: pass\n")
+    (tmp_path / "tools.toml").write_text('[item-data]\nEye = "eye"\n')
+    with MockKoillection(latency=0.3) as mock:
+        with open("MMK.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "name", "image_url", "description", "rarity", "eye"])
+            writer.writeheader()
+            writer.writerow({"id": "MMK-001", "name": "Flower", "image_url": f"{mock.url}/images/1.png", "description": "petals",
+                             "rarity": "C", "eye": "blue"})
+        assert main(["--config", "tools.toml", "post-items", "MMK.csv", "--collection", UUID, "--domain", mock.url,
+                     "--item-data", "Tribe=rarity", "--limit", "data=rate:50,burst:10", "--limit", "image=rate:50,burst:10"]) == 0
+
+        data = {datum["label"]: datum["value"] for datum in mock.records["data"].values()}
+        assert data == {"Set Number": "MMK-001", "Description": "petals", "Rarity": "C", "Eye": "blue", "Tribe": "C"}
+        (item_id,) = mock.records["items"]
+        attach = [entry for entry in mock.log if entry["id"] == item_id and entry["path"] != "/api/items"]
+        assert len(attach) == len(data) + 1
+        # every datum and the image upload were in flight at the same moment
+        assert max(entry["start"] for entry in attach) < min(entry["end"] for entry in attach)
+
+    # a csv without a configured column fails validation instead of failing mid-run
+    problems = validate_cards([{"id": "MMK-002", "name": "Leaf", "image_url": "https://x.com/a.png", "description": "", "rarity": "C"}],
+                              FORMATS["murakami"], "items", item_data({"Eye": "eye"}))[1]
+    assert "missing column(s) eye" in str(problems[0])
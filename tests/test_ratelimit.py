@@ -0,0 +1,72 @@
+import multiprocessing
+import time
+
+from name.ratelimit import AdaptiveRateLimiter, EndpointLimits, SharedRateBudget, endpoint_key, parse_retry_after
+
+
+def test_endpoint_key():
+    assert endpoint_key("/api/wishes") == "wishes"
+    assert endpoint_key("/api/items/123/image") == "image"
+    assert endpoint_key("/api/data") == "data"
+    assert endpoint_key("/other") == "default"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+
+
+def test_backs_off_on_throttling_and_ramps_up_on_fast_responses():
+    limiter = AdaptiveRateLimiter(rate=4.0, min_rate=1.0, max_rate=5.0)
+    limiter.feedback(429, 0.1)
+    assert limiter.rate == 2.0
+    limiter.feedback(503, 0.1)
+    limiter.feedback(503, 0.1)
+    assert limiter.rate == 1.0
+    for _ in range(20):
+        limiter.feedback(201, 0.05)
+    assert limiter.rate == 5.0
+
+
+def test_honors_retry_after():
+    limiter = AdaptiveRateLimiter(rate=100.0, burst=10)
+    limiter.feedback(429, 0.1, retry_after="0.2")
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+
+
+def test_limits_are_per_endpoint():
+    limits = EndpointLimits({"image": {"rate": 0.5}})
+    assert limits.for_path("/api/items/1/image") is limits.for_path("/api/wishes/2/image")
+    assert limits.for_path("/api/items/1/image").rate == 0.5
+    assert limits.for_path("/api/wishes") is not limits.for_path("/api/items")
+
+
+def _draw(directory, count):
+    budget = SharedRateBudget("koillection.test", rate=40.0, burst=1, directory=directory)
+    for _ in range(count):
+        budget.acquire()
+    budget.close()
+
+
+def test_shared_budget_spans_processes(tmp_path):
+    # three processes of 10 requests each at 40/s share one budget, so they need about 29/40 s together
+    started = time.monotonic()
+    workers = [multiprocessing.get_context("fork").Process(target=_draw, args=(tmp_path, 10)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert time.monotonic() - started >= 0.7
+
+
+def test_shared_budget_throttle_pauses_every_holder(tmp_path):
+    first = SharedRateBudget("koillection.test", rate=100.0, directory=tmp_path)
+    second = SharedRateBudget("koillection.test", rate=100.0, directory=tmp_path)
+    first.feedback(429, retry_after="0.2")
+    started = time.monotonic()
+    second.acquire()
+    assert time.monotonic() - started >= 0.19
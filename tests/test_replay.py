@@ -0,0 +1,103 @@
+import gzip
+import json
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from name import replay
+from name.fetch import new_session
+from name.limitless import scrape
+from name.replay import Recorder, Replayer, ReplayMiss
+from name.retry import RETRY, was_not_sent
+
+
+def test_record_then_replay_without_the_server(fixture_server, tmp_path, monkeypatch):
+    archive = tmp_path / "run.jsonl.gz"
+    urls = [f"{fixture_server}/cards/BS/{n}" for n in range(1, 4)]
+    recorder = Recorder(archive)
+    monkeypatch.setattr(replay, "TAPE", recorder)
+    recorded = scrape(urls, workers=2)
+    recorder.close()
+
+    with gzip.open(archive, "rt") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["format"] == replay.FORMAT
+    assert sorted(entry["url"] for entry in lines[1:]) == urls
+
+    monkeypatch.setattr(replay, "TAPE", Replayer(archive, speed=0))
+    monkeypatch.setattr("requests.adapters.HTTPAdapter.send", lambda *args, **kwargs: pytest.fail("replay went to the network"))
+    assert scrape(urls, workers=2) == recorded
+
+
+def test_replay_serves_answers_in_recorded_order(tmp_path, monkeypatch):
+    archive = tmp_path / "run.jsonl.gz"
+    with gzip.open(archive, "wt") as f:
+        f.write(json.dumps({"format": replay.FORMAT, "version": replay.VERSION}) + "\n")
+        for status in (502, 200):
+            f.write(json.dumps({"method": "GET", "url": "http://down.test/", "body": None, "status": status, "reason": "",
+                                "headers": {"Content-Encoding": "gzip"}, "content": "b2s=", "elapsed": 0.0}) + "\n")
+    monkeypatch.setattr(replay, "TAPE", Replayer(archive, speed=0))
+    session = new_session()
+
+    # the retry policy sends the recorded 502 attempt again and gets the recorded success
+    response = session.get("http://down.test/")
+    assert (response.status_code, response.text, response.headers.get("Content-Encoding")) == (200, "ok", None)
+    # once used up, the last answer repeats
+    assert session.get("http://down.test/").status_code == 200
+    with pytest.raises(ReplayMiss):
+        session.get("http://down.test/never-recorded")
+
+
+def test_recorded_connection_errors_are_raised_again(tmp_path, monkeypatch):
+    archive = tmp_path / "run.jsonl.gz"
+    recorder = Recorder(archive)
+    with pytest.raises(requests.ConnectionError):
+        recorder.send(requests.Request("POST", "http://down.test/api/wishes").prepare(),
+                      lambda: (_ for _ in ()).throw(requests.ConnectionError("refused")))
+    recorder.close()
+    with pytest.raises(requests.ConnectionError, match="replayed"):
+        Replayer(archive, speed=0).send(requests.Request("POST", "http://down.test/api/wishes").prepare())
+
+
+@pytest.mark.parametrize("error", [
+    requests.ConnectTimeout("connect timed out"),
+    requests.ConnectionError(MaxRetryError(None, "http://down.test/api/wishes", NewConnectionError(None, "refused"))),
+])
+def test_recorded_create_retry_replays_the_same_attempts(tmp_path, monkeypatch, error):
+    archive = tmp_path / "run.jsonl.gz"
+    attempts = []
+
+    def send(adapter, request, *args, **kwargs):
+        attempts.append(request.method)
+        if len(attempts) == 1:
+            raise error
+        response = requests.Response()
+        response.status_code, response._content, response._content_consumed = 201, b"{}", True
+        response.request, response.url = request, request.url
+        return response
+
+    monkeypatch.setattr(RETRY, "sleep", lambda seconds: None)
+    monkeypatch.setattr(RETRY, "_breakers", {})
+    monkeypatch.setattr("requests.adapters.HTTPAdapter.send", send)
+    recorder = Recorder(archive)
+    monkeypatch.setattr(replay, "TAPE", recorder)
+    assert new_session().post("http://down.test/api/wishes", json={"name": "Alakazam"}).status_code == 201
+    recorder.close()
+    assert attempts == ["POST", "POST"]
+
+    replayer = Replayer(archive, speed=0)
+    replayed = []
+
+    def replay_send(request, send=None):
+        try:
+            return replayer.send(request)
+        except requests.RequestException as e:
+            replayed.append(e)
+            raise
+
+    monkeypatch.setattr(replay, "TAPE", type("Tape", (), {"send": staticmethod(replay_send)})())
+    monkeypatch.setattr("requests.adapters.HTTPAdapter.send", lambda *args, **kwargs: pytest.fail("replay went to the network"))
+    # the create is retried on the replayed error just like it was on the recorded one
+    assert new_session().post("http://down.test/api/wishes", json={"name": "Alakazam"}).status_code == 201
+    assert [type(e) for e in replayed] == [type(error)] and was_not_sent(replayed[0])
@@ -0,0 +1,192 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from name import retry as retry_module
+from name.koillection import MAX_THROTTLE_RETRIES, KoillectionClient
+from name.ratelimit import EndpointLimits
+from name.retry import CircuitBreaker, CircuitOpen, RetryPolicy, backoff
+
+
+def prepared(method, url="http://koillection.test/api/wishes"):
+    return requests.Request(method, url).prepare()
+
+
+def response(status, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers or {})
+    result._content, result._content_consumed = b"", True
+    return result
+
+
+def scripted(*outcomes):
+    # send() stand-in that returns statuses and raises exceptions in order
+    calls = []
+
+    def send():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return response(outcome)
+    return send, calls
+
+
+def policy(**kwargs):
+    sleeps = []
+    return RetryPolicy(sleep=sleeps.append, rand=lambda: 1.0, **kwargs), sleeps
+
+
+def test_backoff_is_capped_and_jittered():
+    assert backoff(0, 0.5, 30.0, rand=lambda: 1.0) == 0.5
+    assert backoff(3, 0.5, 30.0, rand=lambda: 1.0) == 4.0
+    assert backoff(10, 0.5, 30.0, rand=lambda: 1.0) == 30.0
+    assert backoff(3, 0.5, 30.0, rand=lambda: 0.25) == 1.0
+
+
+def test_idempotent_requests_retry_server_errors():
+    retry, sleeps = policy(attempts=4)
+    send, calls = scripted(502, requests.ConnectionError("reset"), 200)
+    assert retry.send(prepared("GET"), send).status_code == 200
+    assert len(calls) == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_the_last_attempt():
+    retry, _ = policy(attempts=2)
+    send, calls = scripted(504, 504, 200)
+    assert retry.send(prepared("DELETE"), send).status_code == 504
+    assert len(calls) == 2
+
+
+def test_throttles_are_left_to_the_caller():
+    retry, _ = policy()
+    send, calls = scripted(503, 429, 200)
+    assert retry.send(prepared("GET"), send).status_code == 503
+    assert len(calls) == 1
+
+
+def test_creates_are_not_sent_twice():
+    retry, _ = policy()
+    send, calls = scripted(502, 200)
+    assert retry.send(prepared("POST"), send).status_code == 502
+    send, calls = scripted(requests.ReadTimeout("no answer"), 200)
+    with pytest.raises(requests.ReadTimeout):
+        retry.send(prepared("POST"), send)
+    assert len(calls) == 1
+
+
+def test_creates_retry_when_nothing_was_sent():
+    retry, _ = policy()
+    send, calls = scripted(requests.ConnectTimeout("no connection"), 201)
+    assert retry.send(prepared("POST"), send).status_code == 201
+    # replacing an image is safe to repeat
+    send, calls = scripted(500, 201)
+    assert retry.send(prepared("POST", "http://koillection.test/api/items/abc/image"), send).status_code == 201
+
+
+def test_retry_after_sets_the_minimum_pause():
+    retry, sleeps = policy()
+    responses = iter([response(504, {"Retry-After": "7"}), response(200)])
+    assert retry.send(prepared("GET"), lambda: next(responses)).status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_breaker_pauses_callers_until_a_probe_succeeds():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.1)
+    breaker.failure()
+    assert not breaker.open
+    breaker.failure()
+    assert breaker.open
+
+    started = time.monotonic()
+    assert breaker.before() is True  # waits out the cooldown, then this caller probes
+    assert time.monotonic() - started >= 0.09
+    waiter_done = threading.Event()
+    waiter = threading.Thread(target=lambda: (breaker.before(), waiter_done.set()))
+    waiter.start()
+    # the other caller holds back while the probe is in flight
+    assert not waiter_done.wait(0.1)
+    breaker.success(probe=True)
+    waiter.join(1)
+    assert waiter_done.is_set() and not breaker.open
+
+
+def test_failed_probe_doubles_the_cooldown_and_long_outages_still_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05, max_down=0.3)
+    breaker.failure()
+    assert breaker.before()
+    breaker.failure(probe=True)
+    assert breaker.current_cooldown == 0.1
+    time.sleep(0.3)
+    # past max_down a probe still goes out per cooldown, everyone else fails fast meanwhile
+    assert breaker.before() is True
+    with pytest.raises(CircuitOpen):
+        breaker.before()
+    breaker.success(probe=True)
+    assert breaker.before() is False
+
+
+def test_policy_keeps_one_breaker_per_host():
+    retry, _ = policy(attempts=1, breaker={"threshold": 1, "cooldown": 60.0, "max_down": 0.0})
+    send, _ = scripted(502)
+    retry.send(prepared("GET", "http://down.test/"), send)
+    assert retry.breaker("down.test").open
+    assert not retry.breaker("up.test").open
+    with pytest.raises(CircuitOpen):
+        retry.send(prepared("GET", "http://down.test/"), send)
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    # logs in anyone, answers everything else with the server's status
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/api/authentication_token":
+            status, body = 200, b'{"token": "token"}'
+        else:
+            self.server.attempts.append((self.command, self.path))
+            status, body = self.server.status, b"{}"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _answer
+
+
+@pytest.mark.parametrize("status, method, path, attempts", [
+    # throttles are retried by the client alone, so its limiters see every one of them
+    (503, "POST", "/api/wishes/abc/image", MAX_THROTTLE_RETRIES + 1),
+    (429, "GET", "/api/wishes", MAX_THROTTLE_RETRIES + 1),
+    # server errors by the adapter alone
+    (502, "GET", "/api/wishes", retry_module.DEFAULT_RETRY["attempts"]),
+    (502, "POST", "/api/wishes", 1),
+])
+def test_each_layer_retries_its_own_statuses(monkeypatch, tmp_path, status, method, path, attempts):
+    monkeypatch.setattr(retry_module.RETRY, "sleep", lambda seconds: None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    server.status, server.attempts = status, []
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    try:
+        fast = {"rate": 1000.0, "max_rate": 1000.0, "burst": 1000}
+        client = KoillectionClient("user", "pass", f"http://127.0.0.1:{server.server_address[1]}",
+                                   limits=EndpointLimits({key: fast for key in ("wishes", "image")}))
+        image = tmp_path / "card.png"
+        image.write_bytes(b"png")
+        with pytest.raises(requests.HTTPError):
+            client.request(method, path, **({"files": {"file": image}} if path.endswith("image") else {}))
+        assert server.attempts == [(method, path)] * attempts
+    finally:
+        server.shutdown()
+        server.server_close()
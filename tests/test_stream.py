@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+from lxml import etree
+
+from conftest import PADDING
+from name.stream import extract_streaming
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+import getone  # noqa: E402
+
+XPATHS = {"Image URL": "(//img)[1]/@src", "Name": "//span[@class='card-text-name']/a"}
+
+
+def test_extract_streaming_hangs_up_early(fixture_server):
+    values, received = extract_streaming(f"{fixture_server}/padded/cards/BS/1", XPATHS, chunk_size=4096)
+    assert values == {"Image URL": "https://images.pokemontcg.io/base1/1_hires.png", "Name": "Alakazam"}
+    assert received < len(PADDING) / 10
+
+
+def test_extract_streaming_reads_to_the_end_when_unanswered(fixture_server):
+    values, received = extract_streaming(f"{fixture_server}/cards/BS/1", {"Missing": "//video/@src", "Image URL": "(//img)[1]/@src"})
+    assert values == {"Missing": "", "Image URL": "https://images.pokemontcg.io/base1/1_hires.png"}
+    assert received > 0
+
+
+def test_extract_streaming_raises_for_status(fixture_server):
+    with pytest.raises(requests.HTTPError):
+        extract_streaming(f"{fixture_server}/missing", XPATHS)
+
+
+def test_empty_page_only_loses_its_own_row(fixture_server, capsys):
+    with pytest.raises(etree.LxmlError):
+        extract_streaming(f"{fixture_server}/empty", XPATHS)
+    assert getone.stream_and_extract(f"{fixture_server}/empty") is None
+    assert getone.fetch_and_extract(f"{fixture_server}/empty") is None
+    assert getone.stream_and_extract(f"{fixture_server}/cards/BS/1")["Image URL"] == "https://images.pokemontcg.io/base1/1_hires.png"
+    assert "[ERROR] Parsing" in capsys.readouterr().out
@@ -0,0 +1,40 @@
+from name.sync import comparable_fields, fetch_all, plan_sync
+
+
+class FakeClient:
+    def __init__(self, records, page_size):
+        self.records = records
+        self.page_size = page_size
+        self.pages = []
+
+    def get(self, path, params):
+        page = params["page"]
+        self.pages.append(page)
+        start = (page - 1) * self.page_size
+        return {"hydra:member": self.records[start:start + self.page_size], "hydra:totalItems": len(self.records)}
+
+
+def test_fetch_all_reads_every_page():
+    client = FakeClient([{"id": str(n)} for n in range(7)], page_size=3)
+    assert [record["id"] for record in fetch_all(client, "/api/wishlists/x/wishes")] == [str(n) for n in range(7)]
+    assert sorted(client.pages) == [1, 2, 3]
+
+
+def test_plan_sync():
+    cards = [
+        {"URL": "https://limitlesstcg.com/cards/BS/1", "Price": "10.00"},
+        {"URL": "https://limitlesstcg.com/cards/BS/2", "Price": "2.00"},
+        {"URL": "https://limitlesstcg.com/cards/BS/3", "Price": "3.00"},
+    ]
+    remote = [
+        {"id": "a", "url": "https://limitlesstcg.com/cards/BS/1", "price": "12.00"},
+        {"id": "b", "url": "https://limitlesstcg.com/cards/BS/2", "price": "2.00"},
+        {"id": "c", "url": "https://limitlesstcg.com/cards/BS/99", "price": "1.00"},
+    ]
+    plan = plan_sync(
+        cards, remote, lambda card: card["URL"], lambda wish: wish["url"],
+        compare=lambda card: comparable_fields({"price": card["Price"], "wishlist": "/api/wishlists/x"}),
+    )
+    assert plan.create == [cards[2]]
+    assert plan.update == [("a", cards[0], {"price": "10.00"})]
+    assert plan.delete == ["c"]
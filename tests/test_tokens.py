@@ -0,0 +1,56 @@
+import json
+import os
+import stat
+import threading
+import time
+
+from test_koillection import FakeSession, make_client, make_token
+from name.tokens import TokenCache
+
+
+def client_with_cache(session, path):
+    client = make_client(session)
+    client.token_cache = TokenCache(path)
+    return client
+
+
+def test_token_is_reused_across_runs(tmp_path):
+    path = tmp_path / "tokens.json"
+    first = FakeSession([make_token(time.time() + 3600)])
+    client_with_cache(first, path).create_wish({"name": "Pikachu"})
+    second = FakeSession([])
+    client_with_cache(second, path).create_wish({"name": "Raichu"})
+    assert (first.auth_calls, second.auth_calls) == (1, 0)
+    assert second.seen_tokens == first.seen_tokens
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_expired_and_rejected_tokens_are_replaced(tmp_path):
+    path = tmp_path / "tokens.json"
+    old = make_token(time.time() + 10)
+    client_with_cache(FakeSession([old]), path).create_item({"name": "Flower"})
+    fresh, newer = make_token(time.time() + 3600), make_token(time.time() + 7200)
+    session = FakeSession([fresh, newer], statuses=[401, 201])
+    client_with_cache(session, path).create_item({"name": "Skull"})
+    # the cached token was about to expire, and the server then turned the fresh one down
+    assert session.seen_tokens == [f"Bearer {fresh}", f"Bearer {newer}"]
+    assert json.loads(path.read_text())["user@https://koillection.test"]["token"] == newer
+
+
+def test_concurrent_processes_log_in_once(tmp_path):
+    path = tmp_path / "tokens.json"
+    session = FakeSession([make_token(time.time() + 3600) for _ in range(8)])
+    login = session.post
+
+    def slow_login(*args, **kwargs):
+        time.sleep(0.05)
+        return login(*args, **kwargs)
+    session.post = slow_login
+
+    # a cache object per thread opens its own lock file descriptor, like separate processes would
+    threads = [threading.Thread(target=client_with_cache(session, path).create_wish, args=({"name": "Pikachu"},)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert session.auth_calls == 1
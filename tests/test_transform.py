@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from name.images import ImageCache
+from name.journal import Journal
+from name.koillection import KoillectionClient
+from name.mock_server import MockKoillection
+from name.pipeline import Job
+from name.posting import FORMATS, Target, post_jobs
+from name.transform import ImageTransform, ImageTransformer
+
+Image = pytest.importorskip("PIL.Image")
+
+COLLECTION = "/api/collections/00000000-0000-4000-8000-000000000002"
+
+
+def test_downscales_reencodes_and_caches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Image.new("RGBA", (2000, 1000), (255, 0, 0, 255)).save("card.png")
+
+    transformer = ImageTransformer(ImageTransform(500, "JPEG", 80), "out", workers=1)
+    try:
+        # relative paths still work for workers started from a forkserver in another directory
+        output = transformer.submit("card.png").result()
+        with Image.open(output) as result:
+            assert result.format == "JPEG"
+            assert result.size == (500, 250)
+            assert "exif" not in result.info
+        assert transformer.submit("card.png").done()
+    finally:
+        transformer.shutdown()
+
+
+def test_transform_stage_runs_inside_the_posting_pipeline(tmp_path, monkeypatch):
+    # the pool starts its workers while download threads hold the image cache lock, which must not leak into them
+    monkeypatch.chdir(tmp_path)
+    with MockKoillection() as mock:
+        cards = [{"id": f"MMK-{n:03}", "name": f"Flower {n}", "image_url": f"{mock.url}/images/mmk{n}.png",
+                  "description": "", "rarity": "C"} for n in range(12)]
+        target = Target("items", COLLECTION, FORMATS["murakami"], Journal(tmp_path / "journal.jsonl"))
+        transformer = ImageTransformer(ImageTransform(64, "PNG"), tmp_path / "out", workers=2)
+        client = KoillectionClient("user", "pass", mock.url)
+        jobs = []
+        thread = threading.Thread(target=lambda: jobs.extend(post_jobs(
+            client, (Job(n, card, target=target) for n, card in enumerate(cards)), ImageCache(tmp_path / "image"), transformer,
+        )), daemon=True)
+        thread.start()
+        thread.join(60)
+        transformer.shutdown()
+        assert not thread.is_alive()
+        assert all(job.results["transform"].startswith(str(tmp_path / "out")) for job in jobs)
+        assert len(mock.images) == len(cards)
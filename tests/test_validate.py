@@ -0,0 +1,73 @@
+import csv
+
+import pytest
+
+from name.cli import main
+from name.posting import FORMATS
+from name.validate import normalize_price, normalize_url, validate_cards
+
+MURAKAMI = {"id": "MMK-001", "name": "ゆめらいおん", "image_url": "https://mmktc.kaikaikiki.comassets/images/card/MMK-001.jpg",
+            "description": "", "rarity": "C"}
+
+
+def pokemon(n, **fields):
+    return {"URL": f"https://limitlesstcg.com/cards/BS/{n}", "Image URL": f"https://images.pokemontcg.io/base1/{n}_hires.png",
+            "Name": f"Card {n}", "Number": f"#{n}", "Set": "Base Set (BS)", "Price": "1.50", **fields}
+
+
+def test_murakami_image_url_is_repaired():
+    assert normalize_url(MURAKAMI["image_url"]) == "https://mmktc.kaikaikiki.com/assets/images/card/MMK-001.jpg"
+    assert normalize_url(" https://www.community.com/x.png ") == "https://www.community.com/x.png"
+    with pytest.raises(ValueError):
+        normalize_url("images/card/MMK-001.jpg")
+
+
+def test_normalize_price():
+    assert normalize_price(" $46.67 ") == "46.67"
+    assert normalize_price("1e2") == "100"
+    for bad in ("", "n/a", "12,50", "-1", "NaN"):
+        with pytest.raises(ValueError):
+            normalize_price(bad)
+
+
+def test_validate_cards_keeps_only_rows_that_will_post():
+    cards = [pokemon(1), pokemon(2, Price="$3"), pokemon(3, Price=""), pokemon(4, **{"Image URL": ""}), pokemon(1, Name="Again")]
+    clean, problems = validate_cards(cards, FORMATS["pokemon"], "wishes")
+    assert [(card["Name"], card["Price"]) for card in clean] == [("Card 1", "1.50"), ("Card 2", "3")]
+    assert [(problem.row, problem.message) for problem in problems] == [
+        (3, "empty Price"),
+        (4, "empty Image URL"),
+        (5, "duplicate URL of row 1"),
+    ]
+
+
+def test_items_need_the_datum_columns():
+    card = {key: value for key, value in MURAKAMI.items() if key != "rarity"}
+    assert validate_cards([card], FORMATS["murakami"], "items")[1][0].message == "missing column(s) rarity"
+    clean, problems = validate_cards([MURAKAMI], FORMATS["murakami"], "items")
+    assert not problems and clean[0]["image_url"].startswith("https://mmktc.kaikaikiki.com/assets/")
+
+
+def test_validate_command_writes_the_clean_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("MMK.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(MURAKAMI))
+        writer.writeheader()
+        writer.writerows([MURAKAMI, {**MURAKAMI, "id": "MMK-002", "name": ""}])
+    with pytest.raises(SystemExit) as exit_info:
+        main(["validate", "MMK.csv", "--items"])
+    assert exit_info.value.code == 1
+    with open("MMK.clean.csv", newline="", encoding="utf-8") as f:
+        assert [row["id"] for row in csv.DictReader(f)] == ["MMK-001"]
+
+
+def test_strict_posting_sends_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "credentials.txt").write_text("username: user\npassword: pass\n")
+    with open("BS.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(pokemon(1)))
+        writer.writeheader()
+        writer.writerows([pokemon(1), pokemon(2, Price="")])
+    # nothing listens on the domain, any request would fail the run with a connection error instead
+    with pytest.raises(SystemExit, match="nothing was sent"):
+        main(["post-wishes", "BS.csv", "--wishlist", "0b6c1f1e-53c5-4b8e-a1a8-5b7c1c1d2e3f", "--domain", "http://127.0.0.1:9", "--strict"])